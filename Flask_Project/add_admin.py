@@ -1,7 +1,7 @@
 from app import create_app
 from app.extensions import db
 from app.models import User
-from werkzeug.security import generate_password_hash
+from app.services.password_hashing import PasswordHashingService
 
 app = create_app()
 
@@ -22,7 +22,7 @@ with app.app_context():
             print(f"✓ User {email} is now an admin!")
     else:
         # Create new admin user
-        hashed_password = generate_password_hash(password)
+        hashed_password = PasswordHashingService.hash_password(password)
         admin_user = User(
             email=email,
             password=hashed_password,
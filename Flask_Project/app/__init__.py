@@ -1,16 +1,27 @@
 from flask import Flask, jsonify, render_template_string
-from .extensions import db, cors
+from .extensions import db, cors, tour_catalog, remember_token_cache
 from .auth.routes import auth_bp
 from .users.routes import users_bp
 from .bookings.routes import bookings_bp
+from .tours.routes import tours_bp
 from .admin.routes import admin_bp
+from .json_provider import init_json_provider
+from .services.db_pool import init_db_pool
+from .services.perf import init_perf
+from .services.metrics import init_metrics
+from .services.query_counter import init_query_counter
+from .services.email_outbox import init_email_outbox
+from .services.http_cache import init_http_cache
+from .services.compression import init_compression
 from config import config
 
 def create_app(env="development"):
     app = Flask(__name__)
     app.config.from_object(config[env])
+    init_json_provider(app)
 
     # Initialize extensions
+    init_db_pool(app)
     db.init_app(app)
     cors.init_app(
         app,
@@ -19,6 +30,14 @@ def create_app(env="development"):
         allow_headers=["Content-Type", "Authorization"],
         expose_headers=["Content-Type"]
     )
+    tour_catalog.init_app(app)
+    remember_token_cache.init_app(app)
+    init_perf(app)  # registered first so its request span covers the other hooks
+    init_metrics(app)
+    init_query_counter(app)
+    init_email_outbox(app)
+    init_compression(app)  # registered before init_http_cache so it runs after it
+    init_http_cache(app)
 
     @app.route("/")
     def index():
@@ -92,6 +111,7 @@ def create_app(env="development"):
     app.register_blueprint(auth_bp)
     app.register_blueprint(users_bp)
     app.register_blueprint(bookings_bp)
+    app.register_blueprint(tours_bp)
     app.register_blueprint(admin_bp)
 
     # Global error handlers
@@ -0,0 +1,154 @@
+"""
+Booking report helpers shared by the CSV and Excel downloads and the
+background Excel export job.
+
+Rows are read as plain column tuples with yield_per, which uses a
+server-side cursor on PostgreSQL, so a report never holds more than one
+batch of bookings in memory and no ORM objects are built.
+"""
+
+import csv
+from datetime import datetime
+from itertools import chain, islice
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+from app.models import Booking
+from app.extensions import db
+
+REPORT_BATCH_SIZE = 1000
+MAX_COLUMN_WIDTH = 50
+
+REPORT_HEADERS = [
+    'Booking ID', 'User Email', 'Package Name', 'Package Type', 'Destination',
+    'Travel Date', 'Return Date', 'Adults', 'Children', 'Total Amount',
+    'Tax', 'Discount', 'Final Amount', 'Status', 'Payment Status',
+    'Booking Date'
+]
+
+REPORT_COLUMNS = (
+    Booking.booking_id_str, Booking.user_email, Booking.package_name,
+    Booking.package_type, Booking.destination, Booking.travel_date,
+    Booking.return_date, Booking.num_adults, Booking.num_children,
+    Booking.total_amount, Booking.tax_amount, Booking.discount_amount,
+    Booking.final_amount, Booking.status, Booking.payment_status,
+    Booking.booking_date
+)
+
+
+def booking_report_query(status=None, start_date=None, end_date=None):
+    """Build the filtered report query (ISO date strings for the range)"""
+    query = db.session.query(*REPORT_COLUMNS)
+
+    if status:
+        query = query.filter(Booking.status == status)
+    if start_date:
+        query = query.filter(Booking.booking_date >= datetime.fromisoformat(start_date))
+    if end_date:
+        query = query.filter(Booking.booking_date <= datetime.fromisoformat(end_date))
+
+    return query.order_by(Booking.booking_date.desc(), Booking.id.desc())
+
+
+def iter_report_rows(query, batch_size=REPORT_BATCH_SIZE):
+    """Yield report rows (lists matching REPORT_HEADERS) batch by batch"""
+    for row in query.execution_options(yield_per=batch_size):
+        yield [
+            row.booking_id_str,
+            row.user_email,
+            row.package_name,
+            row.package_type,
+            row.destination,
+            row.travel_date.isoformat() if row.travel_date else '',
+            row.return_date.isoformat() if row.return_date else '',
+            row.num_adults,
+            row.num_children,
+            float(row.total_amount),
+            float(row.tax_amount),
+            float(row.discount_amount),
+            float(row.final_amount),
+            row.status,
+            row.payment_status,
+            row.booking_date.isoformat() if row.booking_date else ''
+        ]
+
+
+class _LineBuffer:
+    """File-like sink that hands each csv line back instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, batch_size=REPORT_BATCH_SIZE):
+    """Encode rows as CSV, yielding UTF-8 chunks of up to batch_size lines"""
+    writer = csv.writer(_LineBuffer())
+    chunk = [writer.writerow(REPORT_HEADERS)]
+
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= batch_size:
+            yield "".join(chunk).encode()
+            chunk = []
+
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+def write_excel(rows, output, batch_size=REPORT_BATCH_SIZE):
+    """
+    Write rows to an .xlsx file in a single pass with a write-only workbook.
+
+    Write-only sheets emit column widths before the first row, so widths are
+    sized from the header and the first batch of rows, which is buffered
+    before writing starts.
+
+    Args:
+        rows: Iterable of report rows (see iter_report_rows)
+        output: Path or binary file object to save to
+
+    Returns:
+        int: Number of data rows written
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Bookings Report")
+
+    rows = iter(rows)
+    first_batch = list(islice(rows, batch_size))
+
+    widths = [len(header) for header in REPORT_HEADERS]
+    for row in first_batch:
+        for col, value in enumerate(row):
+            if value is not None and len(str(value)) > widths[col]:
+                widths[col] = len(str(value))
+    for col, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+    # Style header
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="4361EE", end_color="4361EE", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+
+    header_cells = []
+    for header in REPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    count = 0
+    for row in chain(first_batch, rows):
+        ws.append(row)
+        count += 1
+
+    wb.save(output)
+    return count
+
+
+def build_bookings_excel(output, status=None, start_date=None, end_date=None):
+    """Build the bookings Excel report (export job builder)"""
+    query = booking_report_query(status=status, start_date=start_date, end_date=end_date)
+    return write_excel(iter_report_rows(query), output)
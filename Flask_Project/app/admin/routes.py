@@ -1,38 +1,71 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context
 from werkzeug.security import generate_password_hash
 from app.models import User, Booking, Invoice
-from app.extensions import db
-from datetime import datetime, timedelta
-from sqlalchemy import func
-import io
-import csv
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+from app.extensions import db, tour_catalog
+from app.services.search import search_query
+from app.pagination import keyset_page, count_total, InvalidCursor, InvalidLimit
+from app.admin.reports import booking_report_query, iter_report_rows, iter_csv, build_bookings_excel
+from app.services.export_jobs import ExportJobService
+from app.services.analytics import AnalyticsService
+from app.services.query_counter import query_budget
+from app.services.email_outbox import EmailOutboxService
+from app.services.pricing import PricingEngine, parse_rate
+from app.services.perf import SPANS
+from app.services.cache import TTLCache, invalidate_on_commit, notify_changed
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, true
+from sqlalchemy.orm import joinedload
+import os
+import tempfile
 
 admin_bp = Blueprint('admin', __name__, url_prefix="/api/admin")
 
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Dashboard stats, dropped whenever users, bookings or invoices change
+dashboard_cache = TTLCache()
+invalidate_on_commit(dashboard_cache, User, Booking, Invoice)
+
 # ========== User Management ==========
 
 @admin_bp.route("/users", methods=["GET"])
+@query_budget(3)
 def get_all_users():
     """Get all users with pagination"""
     limit = request.args.get("limit", type=int, default=50)
     offset = request.args.get("offset", type=int, default=0)
+    cursor = request.args.get("cursor")  # keyset pagination on (created_at, id)
     search = request.args.get("search", "")
 
     query = User.query
 
-    # Search filter
+    # Search filter (ranked by relevance, then newest first)
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (User.email.ilike(search_filter)) |
-            (User.first_name.ilike(search_filter)) |
-            (User.last_name.ilike(search_filter))
+        query = search_query(
+            query, search,
+            [User.email, User.first_name, User.last_name],
+            order_by=[User.created_at.desc()]
         )
-
-    total = query.count()
-    users = query.order_by(User.created_at.desc()).limit(limit).offset(offset).all()
+    else:
+        query = query.order_by(User.created_at.desc())
+
+    if cursor is not None:
+        try:
+            users, next_cursor = keyset_page(query, [User.created_at, User.id], cursor, limit)
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        except InvalidLimit as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "users": [user.to_dict() for user in users],
+            "next_cursor": next_cursor,
+            "total": count_total(query, request.args.get("total")),
+            "limit": limit
+        }), 200
+
+    total = query.order_by(None).count()
+    users = query.limit(limit).offset(offset).all()
 
     return jsonify({
         "users": [user.to_dict() for user in users],
@@ -79,13 +112,16 @@ def toggle_admin(user_id):
 # ========== Booking Management ==========
 
 @admin_bp.route("/bookings", methods=["GET"])
+@query_budget(3)
 def get_all_admin_bookings():
     """Get all bookings for admin dashboard"""
     limit = request.args.get("limit", type=int, default=50)
     offset = request.args.get("offset", type=int, default=0)
+    cursor = request.args.get("cursor")  # keyset pagination on (booking_date, id)
     status = request.args.get("status")
     payment_status = request.args.get("payment_status")
     search = request.args.get("search", "")
+    view = request.args.get("view")  # 'card' for the lightweight projection
 
     query = Booking.query
 
@@ -94,19 +130,42 @@ def get_all_admin_bookings():
         query = query.filter_by(status=status)
     if payment_status:
         query = query.filter_by(payment_status=payment_status)
+    # Search filter (ranked by relevance, then most recent first)
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Booking.booking_id_str.ilike(search_filter)) |
-            (Booking.user_email.ilike(search_filter)) |
-            (Booking.destination.ilike(search_filter))
+        query = search_query(
+            query, search,
+            [Booking.booking_id_str, Booking.user_email, Booking.destination],
+            order_by=[Booking.booking_date.desc()]
         )
+    else:
+        query = query.order_by(Booking.booking_date.desc())
+
+    # Select plain rows labelled like to_dict()/to_card_dict() and serialize
+    # them directly instead of building Booking objects
+    rows_query = query.with_entities(
+        *Booking.json_columns(Booking.CARD_COLUMNS if view == "card" else None)
+    )
+
+    if cursor is not None:
+        try:
+            rows, next_cursor = keyset_page(rows_query, [Booking.booking_date, Booking.id], cursor, limit)
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        except InvalidLimit as e:
+            return jsonify({"error": str(e)}), 400
 
-    total = query.count()
-    bookings = query.order_by(Booking.booking_date.desc()).limit(limit).offset(offset).all()
+        return jsonify({
+            "bookings": [row._asdict() for row in rows],
+            "next_cursor": next_cursor,
+            "total": count_total(query, request.args.get("total")),
+            "limit": limit
+        }), 200
+
+    total = query.order_by(None).count()
+    rows = rows_query.limit(limit).offset(offset).all()
 
     return jsonify({
-        "bookings": [booking.to_dict() for booking in bookings],
+        "bookings": [row._asdict() for row in rows],
         "total": total,
         "limit": limit,
         "offset": offset
@@ -116,7 +175,7 @@ def get_all_admin_bookings():
 @admin_bp.route("/bookings/<int:booking_id>/status", methods=["PUT"])
 def update_booking_status(booking_id):
     """Update booking status"""
-    booking = Booking.query.get(booking_id)
+    booking = Booking.query.options(joinedload(Booking.invoice)).get(booking_id)
 
     if not booking:
         return jsonify({"error": "Booking not found"}), 404
@@ -142,106 +201,172 @@ def update_booking_status(booking_id):
     }), 200
 
 
+@admin_bp.route("/bookings/reprice", methods=["POST"])
+def reprice_bookings():
+    """
+    Recompute totals for many bookings at once (e.g. after a GST change or
+    for a promo discount) and update bookings and invoices in bulk.
+
+    Body (all optional):
+        tax_rate, child_rate: Rates to apply (default: current config)
+        discount_percent: Replace each discount with this % of the total
+        booking_ids: Only these bookings
+        status: Only bookings with this status
+        payment_status: Only bookings with this payment status (default "Unpaid")
+        dry_run: Report what would change without writing
+    """
+    data = request.get_json() or {}
+
+    rates = {}
+    try:
+        for name, maximum in (("tax_rate", None), ("child_rate", None), ("discount_percent", 100)):
+            if data.get(name) is not None:
+                rates[name] = parse_rate(data[name], name, maximum)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    booking_ids = data.get("booking_ids")
+    if booking_ids is not None and (
+        not isinstance(booking_ids, list)
+        or not all(isinstance(i, int) and not isinstance(i, bool) for i in booking_ids)
+    ):
+        return jsonify({"error": "booking_ids must be a list of integer ids"}), 400
+
+    query = Booking.query
+    if booking_ids:
+        query = query.filter(Booking.id.in_(booking_ids))
+    if data.get("status"):
+        query = query.filter(Booking.status == data["status"])
+    payment_status = data.get("payment_status", "Unpaid")
+    if payment_status:
+        query = query.filter(Booking.payment_status == payment_status)
+
+    dry_run = bool(data.get("dry_run"))
+
+    result = PricingEngine.reprice(query, dry_run=dry_run, **rates)
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+        if result["changed"]:
+            notify_changed(Booking, Invoice)
+
+    return jsonify({
+        "message": "Dry run, nothing updated" if dry_run else "Bookings repriced",
+        "scanned": result["scanned"],
+        "changed": result["changed"],
+        "final_amount_delta": float(result["final_amount_delta"]),
+        "dry_run": dry_run
+    }), 200
+
+
 # ========== Dashboard Statistics ==========
 
 @admin_bp.route("/stats/dashboard", methods=["GET"])
+@query_budget(2)
 def get_dashboard_stats():
-    """Get dashboard statistics"""
-
-    # Total users
-    total_users = User.query.count()
-    new_users_this_month = User.query.filter(
-        User.created_at >= datetime.utcnow().replace(day=1, hour=0, minute=0, second=0)
-    ).count()
-
-    # Total bookings
-    total_bookings = Booking.query.count()
-    pending_bookings = Booking.query.filter_by(status="Pending").count()
-    confirmed_bookings = Booking.query.filter_by(status="Confirmed").count()
-
-    # Revenue stats
-    total_revenue = db.session.query(func.sum(Booking.final_amount)).scalar() or 0
-    paid_revenue = db.session.query(func.sum(Invoice.paid_amount)).scalar() or 0
-    pending_revenue = db.session.query(func.sum(Invoice.balance_due)).scalar() or 0
-
-    # This month stats
-    first_day_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0)
-    this_month_bookings = Booking.query.filter(Booking.booking_date >= first_day_of_month).count()
-    this_month_revenue = db.session.query(func.sum(Booking.final_amount)).filter(
-        Booking.booking_date >= first_day_of_month
-    ).scalar() or 0
+    """Get dashboard statistics (cached for DASHBOARD_STATS_TTL seconds)"""
+    if not request.args.get("refresh"):
+        cached = dashboard_cache.get("dashboard")
+        if cached is not None:
+            return jsonify(cached), 200
+
+    first_day_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    # One round-trip: a conditional aggregate per table, cross-joined
+    user_stats = db.session.query(
+        func.count(User.id).label("users_total"),
+        func.count(User.id).filter(User.created_at >= first_day_of_month).label("users_this_month")
+    ).subquery()
+
+    booking_stats = db.session.query(
+        func.count(Booking.id).label("bookings_total"),
+        func.count(Booking.id).filter(Booking.status == "Pending").label("bookings_pending"),
+        func.count(Booking.id).filter(Booking.status == "Confirmed").label("bookings_confirmed"),
+        func.count(Booking.id).filter(Booking.booking_date >= first_day_of_month).label("bookings_this_month"),
+        func.coalesce(func.sum(Booking.final_amount), 0).label("revenue_total"),
+        func.coalesce(
+            func.sum(Booking.final_amount).filter(Booking.booking_date >= first_day_of_month), 0
+        ).label("revenue_this_month")
+    ).subquery()
+
+    invoice_stats = db.session.query(
+        func.coalesce(func.sum(Invoice.paid_amount), 0).label("revenue_paid"),
+        func.coalesce(func.sum(Invoice.balance_due), 0).label("revenue_pending")
+    ).subquery()
+
+    stats = db.session.query(user_stats, booking_stats, invoice_stats).select_from(user_stats) \
+        .join(booking_stats, true()).join(invoice_stats, true()).one()
 
     # Recent bookings
     recent_bookings = Booking.query.order_by(Booking.booking_date.desc()).limit(5).all()
 
-    return jsonify({
+    result = {
         "users": {
-            "total": total_users,
-            "new_this_month": new_users_this_month
+            "total": stats.users_total,
+            "new_this_month": stats.users_this_month
         },
         "bookings": {
-            "total": total_bookings,
-            "pending": pending_bookings,
-            "confirmed": confirmed_bookings,
-            "this_month": this_month_bookings
+            "total": stats.bookings_total,
+            "pending": stats.bookings_pending,
+            "confirmed": stats.bookings_confirmed,
+            "this_month": stats.bookings_this_month
         },
         "revenue": {
-            "total": float(total_revenue),
-            "paid": float(paid_revenue),
-            "pending": float(pending_revenue),
-            "this_month": float(this_month_revenue)
+            "total": float(stats.revenue_total),
+            "paid": float(stats.revenue_paid),
+            "pending": float(stats.revenue_pending),
+            "this_month": float(stats.revenue_this_month)
         },
         "recent_bookings": [booking.to_dict() for booking in recent_bookings]
-    }), 200
+    }
+
+    dashboard_cache.set("dashboard", result, current_app.config.get("DASHBOARD_STATS_TTL", 0))
+
+    return jsonify(result), 200
 
 
 @admin_bp.route("/stats/analytics", methods=["GET"])
+@query_budget(3)
 def get_analytics():
-    """Get analytics data for charts"""
+    """Get analytics data for charts (served from booking_daily_rollups)"""
     days = request.args.get("days", type=int, default=30)
-    start_date = datetime.utcnow() - timedelta(days=days)
-
-    # Daily bookings
-    daily_bookings = db.session.query(
-        func.date(Booking.booking_date).label('date'),
-        func.count(Booking.id).label('count'),
-        func.sum(Booking.final_amount).label('revenue')
-    ).filter(
-        Booking.booking_date >= start_date
-    ).group_by(
-        func.date(Booking.booking_date)
-    ).all()
-
-    # Bookings by status
-    status_breakdown = db.session.query(
-        Booking.status,
-        func.count(Booking.id).label('count')
-    ).group_by(Booking.status).all()
-
-    # Bookings by package type
-    package_breakdown = db.session.query(
-        Booking.package_type,
-        func.count(Booking.id).label('count'),
-        func.sum(Booking.final_amount).label('revenue')
-    ).group_by(Booking.package_type).all()
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+
+    try:
+        range_start = date.fromisoformat(start_date) if start_date else None
+        range_end = date.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        return jsonify({"error": "Dates must be ISO formatted (YYYY-MM-DD)"}), 400
+
+    # Daily bookings (last `days` days unless an explicit range is given)
+    daily_bookings = AnalyticsService.daily(
+        range_start or (datetime.utcnow() - timedelta(days=days)).date(), range_end
+    )
+
+    # Breakdowns cover all bookings unless an explicit range is given
+    status_breakdown = AnalyticsService.by_status(range_start, range_end)
+    package_breakdown = AnalyticsService.by_package_type(range_start, range_end)
 
     return jsonify({
         "daily_bookings": [
             {
-                "date": str(item.date),
-                "count": item.count,
+                "date": str(item.day),
+                "count": int(item.count),
                 "revenue": float(item.revenue or 0)
             }
             for item in daily_bookings
         ],
         "status_breakdown": [
-            {"status": item.status, "count": item.count}
+            {"status": item.status, "count": int(item.count)}
             for item in status_breakdown
         ],
         "package_breakdown": [
             {
-                "package_type": item.package_type,
-                "count": item.count,
+                "package_type": item.package_type or None,
+                "count": int(item.count),
                 "revenue": float(item.revenue or 0)
             }
             for item in package_breakdown
@@ -249,172 +374,176 @@ def get_analytics():
     }), 200
 
 
+@admin_bp.route("/stats/analytics/rebuild", methods=["POST"])
+def rebuild_analytics():
+    """Recompute the analytics rollups from the bookings table"""
+    rows = AnalyticsService.rebuild()
+
+    return jsonify({"message": "Analytics rollups rebuilt", "rows": rows}), 200
+
+
+# ========== Tour Catalog ==========
+
+@admin_bp.route("/tours/reload", methods=["POST"])
+def reload_tour_catalog():
+    """Reload the in-memory tour catalog (run after importing new tour data)"""
+    total = tour_catalog.reload()
+
+    return jsonify({
+        "message": "Tour catalog reloaded",
+        "total": total,
+        "version": tour_catalog.version
+    }), 200
+
+
+# ========== Email Outbox ==========
+
+@admin_bp.route("/email-outbox", methods=["GET"])
+def get_email_outbox_stats():
+    """Queued/sent/failed email counts (delivered by email_worker.py)"""
+    return jsonify({"outbox": EmailOutboxService.stats()}), 200
+
+
+# ========== Performance ==========
+
+@admin_bp.route("/perf", methods=["GET"])
+def get_perf_report():
+    """Latency percentiles per route from this worker's recent requests"""
+    recorder = current_app.extensions.get("perf")
+    if recorder is None:
+        return jsonify({"enabled": False, "routes": []}), 200
+
+    report = recorder.report()
+    if request.args.get("reset", "false").lower() == "true":
+        recorder.clear()
+
+    return jsonify({"enabled": True, "spans": list(SPANS), "routes": report}), 200
+
+
 # ========== Reports & Downloads ==========
 
 @admin_bp.route("/reports/bookings/csv", methods=["GET"])
 def download_bookings_csv():
-    """Download bookings report as CSV"""
-    status = request.args.get("status")
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
-
-    query = Booking.query
+    """Download bookings report as CSV (streamed in batches)"""
+    query = booking_report_query(
+        status=request.args.get("status"),
+        start_date=request.args.get("start_date"),
+        end_date=request.args.get("end_date")
+    )
 
-    # Apply filters
-    if status:
-        query = query.filter_by(status=status)
-    if start_date:
-        query = query.filter(Booking.booking_date >= datetime.fromisoformat(start_date))
-    if end_date:
-        query = query.filter(Booking.booking_date <= datetime.fromisoformat(end_date))
-
-    bookings = query.order_by(Booking.booking_date.desc()).all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Write header
-    writer.writerow([
-        'Booking ID', 'User Email', 'Package Name', 'Package Type', 'Destination',
-        'Travel Date', 'Return Date', 'Adults', 'Children', 'Total Amount',
-        'Tax', 'Discount', 'Final Amount', 'Status', 'Payment Status',
-        'Booking Date'
-    ])
-
-    # Write data
-    for booking in bookings:
-        writer.writerow([
-            booking.booking_id_str,
-            booking.user_email,
-            booking.package_name,
-            booking.package_type,
-            booking.destination,
-            booking.travel_date.isoformat() if booking.travel_date else '',
-            booking.return_date.isoformat() if booking.return_date else '',
-            booking.num_adults,
-            booking.num_children,
-            float(booking.total_amount),
-            float(booking.tax_amount),
-            float(booking.discount_amount),
-            float(booking.final_amount),
-            booking.status,
-            booking.payment_status,
-            booking.booking_date.isoformat() if booking.booking_date else ''
-        ])
-
-    # Prepare response
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode()),
+    filename = f'bookings_report_{datetime.now().strftime("%Y%m%d")}.csv'
+    return Response(
+        stream_with_context(iter_csv(iter_report_rows(query))),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'bookings_report_{datetime.now().strftime("%Y%m%d")}.csv'
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @admin_bp.route("/reports/bookings/excel", methods=["GET"])
 def download_bookings_excel():
-    """Download bookings report as Excel"""
+    """Download bookings report as Excel (write-only workbook, spooled to disk)"""
     status = request.args.get("status")
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
 
-    query = Booking.query
-
-    # Apply filters
-    if status:
-        query = query.filter_by(status=status)
-    if start_date:
-        query = query.filter(Booking.booking_date >= datetime.fromisoformat(start_date))
-    if end_date:
-        query = query.filter(Booking.booking_date <= datetime.fromisoformat(end_date))
-
-    bookings = query.order_by(Booking.booking_date.desc()).all()
-
-    # Create Excel workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Bookings Report"
-
-    # Style header
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4361EE", end_color="4361EE", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-
-    # Write header
-    headers = [
-        'Booking ID', 'User Email', 'Package Name', 'Package Type', 'Destination',
-        'Travel Date', 'Return Date', 'Adults', 'Children', 'Total Amount',
-        'Tax', 'Discount', 'Final Amount', 'Status', 'Payment Status',
-        'Booking Date'
-    ]
-
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-
-    # Write data
-    for row, booking in enumerate(bookings, 2):
-        ws.cell(row=row, column=1, value=booking.booking_id_str)
-        ws.cell(row=row, column=2, value=booking.user_email)
-        ws.cell(row=row, column=3, value=booking.package_name)
-        ws.cell(row=row, column=4, value=booking.package_type)
-        ws.cell(row=row, column=5, value=booking.destination)
-        ws.cell(row=row, column=6, value=booking.travel_date.isoformat() if booking.travel_date else '')
-        ws.cell(row=row, column=7, value=booking.return_date.isoformat() if booking.return_date else '')
-        ws.cell(row=row, column=8, value=booking.num_adults)
-        ws.cell(row=row, column=9, value=booking.num_children)
-        ws.cell(row=row, column=10, value=float(booking.total_amount))
-        ws.cell(row=row, column=11, value=float(booking.tax_amount))
-        ws.cell(row=row, column=12, value=float(booking.discount_amount))
-        ws.cell(row=row, column=13, value=float(booking.final_amount))
-        ws.cell(row=row, column=14, value=booking.status)
-        ws.cell(row=row, column=15, value=booking.payment_status)
-        ws.cell(row=row, column=16, value=booking.booking_date.isoformat() if booking.booking_date else '')
-
-    # Auto-size columns
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    # Save to bytes
-    output = io.BytesIO()
-    wb.save(output)
+    output = tempfile.TemporaryFile()
+    build_bookings_excel(output, status=status, start_date=start_date, end_date=end_date)
     output.seek(0)
 
     return send_file(
         output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        mimetype=EXCEL_MIMETYPE,
         as_attachment=True,
         download_name=f'bookings_report_{datetime.now().strftime("%Y%m%d")}.xlsx'
     )
 
 
+@admin_bp.route("/reports/bookings/excel/jobs", methods=["POST"])
+def create_bookings_excel_job():
+    """Start a background Excel export for large date ranges"""
+    data = request.get_json(silent=True) or {}
+
+    params = {
+        "status": data.get("status"),
+        "start_date": data.get("start_date"),
+        "end_date": data.get("end_date")
+    }
+
+    try:
+        for key in ("start_date", "end_date"):
+            if params[key]:
+                datetime.fromisoformat(params[key])
+    except (TypeError, ValueError):
+        return jsonify({"error": "Dates must be ISO formatted"}), 400
+
+    job = ExportJobService.submit("bookings_report", "xlsx", build_bookings_excel, **params)
+
+    return jsonify({
+        "message": "Export started",
+        "job_id": job["id"],
+        "status": job["status"]
+    }), 202
+
+
+@admin_bp.route("/reports/jobs/<job_id>", methods=["GET"])
+def get_export_job(job_id):
+    """Get the status of an export job"""
+    job = ExportJobService.get(job_id)
+
+    if not job:
+        return jsonify({"error": "Export job not found"}), 404
+
+    return jsonify({"job": job}), 200
+
+
+@admin_bp.route("/reports/jobs/<job_id>/download", methods=["GET"])
+def download_export_job(job_id):
+    """Download the file produced by a finished export job"""
+    job = ExportJobService.get(job_id)
+
+    if not job:
+        return jsonify({"error": "Export job not found"}), 404
+
+    if job["status"] != "done":
+        return jsonify({"error": f"Export job is {job['status']}", "job": job}), 409
+
+    if not os.path.exists(ExportJobService.file_path(job)):
+        return jsonify({"error": "Export file has expired"}), 404
+
+    return send_file(
+        ExportJobService.file_path(job),
+        mimetype=EXCEL_MIMETYPE,
+        as_attachment=True,
+        download_name=job["download_name"]
+    )
+
+
 @admin_bp.route("/invoices", methods=["GET"])
+@query_budget(3)
 def get_all_invoices():
     """Get all invoices"""
     limit = request.args.get("limit", type=int, default=50)
     offset = request.args.get("offset", type=int, default=0)
+    cursor = request.args.get("cursor")  # keyset pagination on (invoice_date, id)
     status = request.args.get("status")
 
-    query = Invoice.query
+    # Load each invoice's booking in the same query
+    query = Invoice.query.options(joinedload(Invoice.booking))
 
     if status:
         query = query.filter_by(status=status)
 
-    total = query.count()
-    invoices = query.order_by(Invoice.invoice_date.desc()).limit(limit).offset(offset).all()
+    next_cursor = None
+    if cursor is not None:
+        try:
+            invoices, next_cursor = keyset_page(query, [Invoice.invoice_date, Invoice.id], cursor, limit)
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        except InvalidLimit as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        total = query.count()
+        invoices = query.order_by(Invoice.invoice_date.desc()).limit(limit).offset(offset).all()
 
     # Get booking details for each invoice
     invoice_data = []
@@ -423,6 +552,14 @@ def get_all_invoices():
         inv_dict['booking'] = invoice.booking.to_dict() if invoice.booking else None
         invoice_data.append(inv_dict)
 
+    if cursor is not None:
+        return jsonify({
+            "invoices": invoice_data,
+            "next_cursor": next_cursor,
+            "total": count_total(query, request.args.get("total")),
+            "limit": limit
+        }), 200
+
     return jsonify({
         "invoices": invoice_data,
         "total": total,
@@ -432,9 +569,10 @@ def get_all_invoices():
 
 
 @admin_bp.route("/invoices/<int:invoice_id>", methods=["GET"])
+@query_budget(1)
 def get_invoice(invoice_id):
     """Get a specific invoice"""
-    invoice = Invoice.query.get(invoice_id)
+    invoice = Invoice.query.options(joinedload(Invoice.booking)).get(invoice_id)
 
     if not invoice:
         return jsonify({"error": "Invoice not found"}), 404
@@ -1,14 +1,22 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import User
-from app.extensions import db
+from app.extensions import db, remember_token_cache
 from app.schemas import SignupSchema, LoginSchema
 from app.services.email_otp import EmailOTPService
 from app.services.jwt_service import JWTService
+from app.services.password_hashing import PasswordHashingService
 from datetime import datetime
+import calendar
 
 auth_bp = Blueprint('auth', __name__, url_prefix="/api/auth")
 
+def _upgrade_password_hash(user, password):
+    """Re-hash a verified password stored under an older hashing policy"""
+    if PasswordHashingService.needs_rehash(user.password):
+        user.password = PasswordHashingService.hash_password(password)
+        db.session.commit()
+
+
 @auth_bp.route("/signup", methods=["POST"])
 def signup():
     """Register a new user and send email OTP for verification"""
@@ -28,7 +36,7 @@ def signup():
     if User.query.filter_by(email=user_data["email"]).first():
         return jsonify({"error": "Email already exists"}), 409
 
-    hashed_password = generate_password_hash(user_data["password"])
+    hashed_password = PasswordHashingService.hash_password(user_data["password"])
 
     new_user = User(
         first_name=user_data["first_name"],
@@ -45,23 +53,15 @@ def signup():
         email_verified=False,
     )
 
-    db.session.add(new_user)
-    db.session.commit()
-
-    # Generate and send OTP for email verification
+    # Generate OTP for email verification; the email is queued in the same
+    # transaction and delivered by the outbox worker
     otp = EmailOTPService.generate_otp()
     new_user.otp_session_id = EmailOTPService.hash_otp(otp)
     new_user.otp_created_at = datetime.utcnow()
-    db.session.commit()
-
-    result = EmailOTPService.send_otp_email(new_user.email, otp)
 
-    if not result["success"]:
-        return jsonify({
-            "error": "Account created but failed to send verification email. Please try resending.",
-            "requiresVerification": True,
-            "email": new_user.email,
-        }), 201
+    db.session.add(new_user)
+    EmailOTPService.queue_otp_email(new_user.email, otp)
+    db.session.commit()
 
     return jsonify({
         "message": "Account created. Please verify your email.",
@@ -88,9 +88,11 @@ def login():
 
     user = User.query.filter_by(email=credentials["email"]).first()
 
-    if not user or not check_password_hash(user.password, credentials["password"]):
+    if not user or not PasswordHashingService.check_password(user.password, credentials["password"]):
         return jsonify({"error": "Invalid email or password"}), 401
 
+    _upgrade_password_hash(user, credentials["password"])
+
     # Check if email is verified
     if not user.email_verified:
         return jsonify({
@@ -134,13 +136,9 @@ def send_otp():
     otp = EmailOTPService.generate_otp()
     user.otp_session_id = EmailOTPService.hash_otp(otp)
     user.otp_created_at = datetime.utcnow()
+    EmailOTPService.queue_otp_email(user.email, otp)
     db.session.commit()
 
-    result = EmailOTPService.send_otp_email(user.email, otp)
-
-    if not result["success"]:
-        return jsonify({"error": "Failed to send verification email"}), 500
-
     return jsonify({"message": "Verification code sent to your email"}), 200
 
 
@@ -216,12 +214,25 @@ def verify_token():
     if not data.get("token"):
         return jsonify({"error": "Token is required"}), 400
 
+    # Verified tokens are answered from memory unless the user changed
+    # (logout, demotion, ...) in any worker since they were cached
+    cached_user = remember_token_cache.get(data["token"])
+    if cached_user is not None:
+        return jsonify({
+            "message": "Token verified successfully",
+            "user": cached_user,
+        }), 200
+
     jwt_service = JWTService()
     payload = jwt_service.verify_remember_token(data["token"])
 
     if not payload:
         return jsonify({"error": "Invalid or expired token"}), 401
 
+    # Read before loading the user, so a change committed in between
+    # invalidates the entry cached below
+    marker = remember_token_cache.marker(payload["user_id"])
+
     user = User.query.filter_by(id=payload["user_id"], email=payload["email"]).first()
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -232,9 +243,15 @@ def verify_token():
     if user.remember_token_expires and user.remember_token_expires < datetime.utcnow():
         return jsonify({"error": "Token has expired"}), 401
 
+    user_dict = user.to_dict()
+    expires_at = payload["exp"]
+    if user.remember_token_expires:
+        expires_at = min(expires_at, calendar.timegm(user.remember_token_expires.utctimetuple()))
+    remember_token_cache.put(data["token"], user.id, user_dict, expires_at, marker)
+
     return jsonify({
         "message": "Token verified successfully",
-        "user": user.to_dict(),
+        "user": user_dict,
     }), 200
 
 
@@ -271,9 +288,11 @@ def admin_login():
 
     user = User.query.filter_by(email=credentials["email"]).first()
 
-    if not user or not check_password_hash(user.password, credentials["password"]):
+    if not user or not PasswordHashingService.check_password(user.password, credentials["password"]):
         return jsonify({"error": "Invalid email or password"}), 401
 
+    _upgrade_password_hash(user, credentials["password"])
+
     if not user.is_admin:
         return jsonify({"error": "Access denied. Admin privileges required."}), 403
 
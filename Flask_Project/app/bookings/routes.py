@@ -1,12 +1,43 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from marshmallow import ValidationError
 from app.models import User, Booking, Invoice
 from app.extensions import db
 from app.schemas import BookingCreateSchema, BookingUpdateSchema
+from app.pagination import keyset_page, count_total, InvalidCursor, InvalidLimit
 from app.utils import generate_booking_id, generate_invoice_number, calculate_booking_totals
+from app.services.analytics import AnalyticsService
+from app.services.cache import notify_changed
+from app.services.id_generator import IdGenerator
+from app.services.pricing import PricingEngine
+from app.services.query_counter import query_budget
+from app.services.http_cache import http_cached
 from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
 
 bookings_bp = Blueprint('bookings', __name__, url_prefix="/api/bookings")
 
+
+def _booking_version(*criteria):
+    """A booking response changes only with the booking's or its invoice's updated_at"""
+    row = db.session.query(Booking.updated_at, Invoice.updated_at) \
+        .outerjoin(Invoice, Invoice.booking_id == Booking.id) \
+        .filter(*criteria).first()
+    if row is None or row[0] is None:
+        return None
+    booking_updated, invoice_updated = row
+    version = f"{booking_updated.isoformat()}|{invoice_updated.isoformat() if invoice_updated else ''}"
+    return version, max(booking_updated, invoice_updated or booking_updated)
+
+
+def _booking_id_version(booking_id):
+    return _booking_version(Booking.id == booking_id)
+
+
+def _booking_str_id_version(booking_id_str):
+    return _booking_version(Booking.booking_id_str == booking_id_str)
+
+
 @bookings_bp.route("/", methods=["POST"])
 def create_booking():
     """Create a new booking"""
@@ -69,7 +100,7 @@ def create_booking():
         booking_id=new_booking.id,
         invoice_date=datetime.utcnow(),
         due_date=datetime.utcnow() + timedelta(days=7),  # 7 days to pay
-        subtotal=totals["total_amount"] - booking_data.get("discount_amount", 0.00),
+        subtotal=totals["subtotal"],
         tax_amount=totals["tax_amount"],
         discount_amount=booking_data.get("discount_amount", 0.00),
         total_amount=totals["final_amount"],
@@ -88,7 +119,142 @@ def create_booking():
     }), 201
 
 
+@bookings_bp.route("/bulk", methods=["POST"])
+def create_bookings_bulk():
+    """
+    Create many bookings (and their invoices) in one transaction.
+
+    Body: {"bookings": [<booking>, ...]} using the single-booking fields.
+    By default the batch is all-or-nothing; with ?partial=true valid items
+    are created and the invalid ones reported.
+    """
+    data = request.get_json() or {}
+    items = data.get("bookings") if isinstance(data, dict) else data
+    partial = request.args.get("partial", "false").lower() == "true"
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "bookings must be a non-empty list"}), 400
+
+    max_items = current_app.config.get("BULK_BOOKING_MAX_ITEMS", 1000)
+    if len(items) > max_items:
+        return jsonify({"error": f"At most {max_items} bookings per request"}), 400
+
+    # Validate the whole batch at once; valid_data stays aligned with items
+    try:
+        loaded = BookingCreateSchema(many=True).load(items)
+        errors = {}
+    except ValidationError as e:
+        loaded = e.valid_data
+        errors = dict(e.messages)
+
+    # Fetch every referenced user in one query
+    user_ids = {item["user_id"] for i, item in enumerate(loaded) if i not in errors}
+    emails = dict(
+        db.session.query(User.id, User.email).filter(User.id.in_(user_ids)).all()
+    ) if user_ids else {}
+
+    for i, item in enumerate(loaded):
+        if i not in errors and item["user_id"] not in emails:
+            errors[i] = {"user_id": ["User not found"]}
+
+    if errors and not partial:
+        return jsonify({"errors": _item_errors(errors)}), 400
+
+    valid = [(i, item) for i, item in enumerate(loaded) if i not in errors]
+    if not valid:
+        return jsonify({"created": [], "errors": _item_errors(errors)}), 400
+
+    now = datetime.utcnow()
+    booking_ids = IdGenerator.booking_ids(len(valid))
+    invoice_numbers = IdGenerator.invoice_numbers(len(valid))
+
+    # Price the whole batch in one pass
+    prices = PricingEngine.price_many(
+        (item["price_per_person"], item["num_adults"],
+         item.get("num_children", 0), item.get("discount_amount", 0))
+        for i, item in valid
+    )
+
+    booking_rows = []
+    for (i, item), booking_id_str, totals in zip(valid, booking_ids, prices):
+        booking_rows.append({
+            "booking_id_str": booking_id_str,
+            "user_id": item["user_id"],
+            "user_email": emails[item["user_id"]],
+            "order_type": item.get("order_type", "tour"),
+            "package_name": item["package_name"],
+            "package_type": item.get("package_type"),
+            "destination": item.get("destination"),
+            "travel_date": item["travel_date"],
+            "return_date": item.get("return_date"),
+            "num_adults": item["num_adults"],
+            "num_children": item.get("num_children", 0),
+            "price_per_person": item["price_per_person"],
+            "total_amount": totals.total_amount,
+            "tax_amount": totals.tax_amount,
+            "discount_amount": totals.discount_amount,
+            "final_amount": totals.final_amount,
+            "status": "Pending",
+            "payment_status": "Unpaid",
+            "special_requests": item.get("special_requests"),
+            "booking_date": now,
+            "updated_at": now
+        })
+
+    # Batched INSERT ... RETURNING, rows come back in parameter order
+    new_ids = db.session.execute(
+        insert(Booking).returning(Booking.id, sort_by_parameter_order=True),
+        booking_rows
+    ).scalars().all()
+
+    invoice_rows = []
+    for booking_pk, row, totals, invoice_number in zip(new_ids, booking_rows, prices, invoice_numbers):
+        invoice_rows.append({
+            "invoice_number": invoice_number,
+            "booking_id": booking_pk,
+            "invoice_date": now,
+            "due_date": now + timedelta(days=7),  # 7 days to pay
+            "subtotal": totals.subtotal,
+            "tax_amount": row["tax_amount"],
+            "discount_amount": row["discount_amount"],
+            "total_amount": row["final_amount"],
+            "paid_amount": 0,
+            "balance_due": row["final_amount"],
+            "status": "Unpaid",
+            "created_at": now,
+            "updated_at": now
+        })
+    db.session.execute(insert(Invoice), invoice_rows)
+
+    # Bulk inserts bypass the flush listeners
+    AnalyticsService.record_bulk_changes(inserted=booking_rows)
+    db.session.commit()
+    notify_changed(Booking, Invoice)
+
+    created = [
+        {
+            "index": i,
+            "id": booking_pk,
+            "booking_id": row["booking_id_str"],
+            "invoice_number": invoice_number,
+            "final_amount": float(row["final_amount"])
+        }
+        for (i, _), booking_pk, row, invoice_number
+        in zip(valid, new_ids, booking_rows, invoice_numbers)
+    ]
+
+    response = {"message": f"{len(created)} bookings created", "created": created}
+    if errors:
+        response["errors"] = _item_errors(errors)
+    return jsonify(response), 201
+
+
+def _item_errors(errors):
+    return [{"index": i, "errors": errors[i]} for i in sorted(errors)]
+
+
 @bookings_bp.route("/", methods=["GET"])
+@query_budget(3)
 def get_all_bookings():
     """Get all bookings (with optional filters)"""
     # Get query parameters
@@ -96,6 +262,8 @@ def get_all_bookings():
     status = request.args.get("status")
     limit = request.args.get("limit", type=int, default=100)
     offset = request.args.get("offset", type=int, default=0)
+    cursor = request.args.get("cursor")  # keyset pagination on (booking_date, id)
+    view = request.args.get("view")  # 'card' for the lightweight projection
 
     query = Booking.query
 
@@ -105,15 +273,33 @@ def get_all_bookings():
     if status:
         query = query.filter_by(status=status)
 
-    # Order by most recent first
-    query = query.order_by(Booking.booking_date.desc())
+    # Plain rows labelled like to_dict()/to_card_dict(), serialized directly
+    rows_query = query.with_entities(
+        *Booking.json_columns(Booking.CARD_COLUMNS if view == "card" else None)
+    )
 
-    # Pagination
+    # Keyset pagination, most recent first
+    if cursor is not None:
+        try:
+            rows, next_cursor = keyset_page(rows_query, [Booking.booking_date, Booking.id], cursor, limit)
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        except InvalidLimit as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "bookings": [row._asdict() for row in rows],
+            "next_cursor": next_cursor,
+            "total": count_total(query, request.args.get("total")),
+            "limit": limit
+        }), 200
+
+    # Pagination, most recent first
     total = query.count()
-    bookings = query.limit(limit).offset(offset).all()
+    rows = rows_query.order_by(Booking.booking_date.desc()).limit(limit).offset(offset).all()
 
     return jsonify({
-        "bookings": [booking.to_dict() for booking in bookings],
+        "bookings": [row._asdict() for row in rows],
         "total": total,
         "limit": limit,
         "offset": offset
@@ -121,9 +307,11 @@ def get_all_bookings():
 
 
 @bookings_bp.route("/<int:booking_id>", methods=["GET"])
+@query_budget(2)
+@http_cached(validator=_booking_id_version)
 def get_booking(booking_id):
     """Get a specific booking by ID"""
-    booking = Booking.query.get(booking_id)
+    booking = Booking.query.options(joinedload(Booking.invoice)).get(booking_id)
 
     if not booking:
         return jsonify({"error": "Booking not found"}), 404
@@ -140,7 +328,7 @@ def get_booking(booking_id):
 @bookings_bp.route("/<int:booking_id>", methods=["PUT"])
 def update_booking(booking_id):
     """Update a booking (typically for admin)"""
-    booking = Booking.query.get(booking_id)
+    booking = Booking.query.options(joinedload(Booking.invoice)).get(booking_id)
 
     if not booking:
         return jsonify({"error": "Booking not found"}), 404
@@ -160,8 +348,9 @@ def update_booking(booking_id):
         if field in update_data:
             setattr(booking, field, update_data[field])
 
-    # If price changed, recalculate totals
-    if "price_per_person" in update_data or "discount_amount" in update_data:
+    # If price, discount or travellers changed, recalculate totals
+    if any(field in update_data for field in
+           ("price_per_person", "discount_amount", "num_adults", "num_children")):
         price = update_data.get("price_per_person", booking.price_per_person)
         discount = update_data.get("discount_amount", booking.discount_amount)
 
@@ -180,7 +369,7 @@ def update_booking(booking_id):
 
         # Update invoice if exists
         if booking.invoice:
-            booking.invoice.subtotal = totals["total_amount"] - float(discount)
+            booking.invoice.subtotal = totals["subtotal"]
             booking.invoice.tax_amount = totals["tax_amount"]
             booking.invoice.discount_amount = discount
             booking.invoice.total_amount = totals["final_amount"]
@@ -209,9 +398,12 @@ def delete_booking(booking_id):
 
 
 @bookings_bp.route("/by-booking-id/<booking_id_str>", methods=["GET"])
+@query_budget(2)
+@http_cached(validator=_booking_str_id_version)
 def get_booking_by_str_id(booking_id_str):
     """Get booking by booking_id string (e.g., BK-20240101-ABC1)"""
-    booking = Booking.query.filter_by(booking_id_str=booking_id_str).first()
+    booking = Booking.query.options(joinedload(Booking.invoice)) \
+        .filter_by(booking_id_str=booking_id_str).first()
 
     if not booking:
         return jsonify({"error": "Booking not found"}), 404
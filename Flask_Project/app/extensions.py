@@ -1,5 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from .services.tour_catalog import TourCatalog
+from .services.token_cache import RememberTokenCache
 
 db = SQLAlchemy()
 cors = CORS()
+tour_catalog = TourCatalog()
+remember_token_cache = RememberTokenCache()
@@ -0,0 +1,78 @@
+"""
+JSON Providers
+==============
+Encoders for app.json, selected by JSON_PROVIDER.
+
+"orjson" serializes in C and handles datetimes, dates and UUIDs natively;
+"default" is Flask's stdlib provider. Both encode dates/datetimes as ISO
+8601 (matching the to_dict() methods) and Decimals as numbers, so rows
+selected with Model.json_columns() can be returned as-is without building
+model objects or converting each value in Python.
+"""
+
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from app.services.perf import timed
+
+try:
+    import orjson
+except ImportError:  # optional dependency, stdlib json only
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, date):  # datetime is a date subclass
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Flask's stdlib provider with ISO 8601 dates instead of HTTP dates"""
+
+    default = staticmethod(_default)
+
+    def response(self, *args, **kwargs):
+        with timed("json"):
+            return super().response(*args, **kwargs)
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed provider; sorts keys like Flask's default provider"""
+
+    sort_keys = True
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        option = self.option
+        if kwargs.pop("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        with timed("json"):
+            body = orjson.dumps(obj, default=_default, option=option)
+        return self._app.response_class(body, mimetype="application/json")
+
+
+def init_json_provider(app):
+    """Install the provider named by JSON_PROVIDER ("orjson" or "default")"""
+    if app.config.get("JSON_PROVIDER", "orjson") == "orjson" and orjson is not None:
+        app.json = OrjsonProvider(app)
+    else:
+        app.json = IsoJSONProvider(app)
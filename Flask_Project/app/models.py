@@ -1,9 +1,18 @@
 from .extensions import db
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import cast
+from sqlalchemy.orm import load_only
 from datetime import datetime
 
+# Number sources for booking IDs and invoice numbers (see app/services/id_generator.py)
+booking_number_seq = db.Sequence("booking_number_seq", metadata=db.metadata)
+invoice_number_seq = db.Sequence("invoice_number_seq", metadata=db.metadata)
+
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
@@ -20,7 +29,7 @@ class User(db.Model):
     address_country = db.Column(db.String(100), nullable=True)
 
     is_admin = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # keyset key (admin users list)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Email verification
@@ -59,6 +68,10 @@ class User(db.Model):
 
 class Booking(db.Model):
     __tablename__ = "bookings"
+    __table_args__ = (
+        db.Index("ix_bookings_booking_date_id", "booking_date", "id"),
+        db.Index("ix_bookings_user_id_booking_date_id", "user_id", "booking_date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     booking_id_str = db.Column(db.String(20), unique=True, nullable=False, index=True)
@@ -100,6 +113,66 @@ class Booking(db.Model):
     # Relationships
     invoice = db.relationship('Invoice', backref='booking', uselist=False, cascade="all, delete-orphan")
 
+    # Attributes in to_dict() order, and the to_dict() keys that differ
+    JSON_FIELDS = (
+        "id", "booking_id_str", "user_id", "user_email", "order_type",
+        "package_name", "package_type", "destination", "travel_date",
+        "return_date", "num_adults", "num_children", "price_per_person",
+        "total_amount", "tax_amount", "discount_amount", "final_amount",
+        "status", "payment_status", "special_requests", "notes",
+        "booking_date", "updated_at", "extra_data"
+    )
+    JSON_KEYS = {"booking_id_str": "booking_id", "extra_data": "metadata"}
+
+    # Columns needed to render a booking card in list views
+    CARD_COLUMNS = (
+        "id", "booking_id_str", "user_id", "user_email", "order_type",
+        "package_name", "package_type", "destination", "travel_date",
+        "num_adults", "num_children", "final_amount", "status",
+        "payment_status", "booking_date"
+    )
+
+    @classmethod
+    def json_columns(cls, fields=None):
+        """
+        SELECT list labelled with to_dict() keys (JSON_FIELDS, or e.g.
+        CARD_COLUMNS), so result rows serialize directly via row._asdict().
+        Numeric columns are cast to float in SQL; dates are encoded by the
+        app's JSON provider.
+        """
+        columns = []
+        for name in fields or cls.JSON_FIELDS:
+            column = getattr(cls, name)
+            if isinstance(column.type, db.Numeric):
+                column = cast(column, db.Float)
+            columns.append(column.label(cls.JSON_KEYS.get(name, name)))
+        return columns
+
+    @classmethod
+    def card_load_options(cls):
+        """Loader option restricting the SELECT to CARD_COLUMNS"""
+        return load_only(*(getattr(cls, name) for name in cls.CARD_COLUMNS))
+
+    def to_card_dict(self):
+        """Lightweight representation for list views (see CARD_COLUMNS)"""
+        return {
+            "id": self.id,
+            "booking_id": self.booking_id_str,
+            "user_id": self.user_id,
+            "user_email": self.user_email,
+            "order_type": self.order_type,
+            "package_name": self.package_name,
+            "package_type": self.package_type,
+            "destination": self.destination,
+            "travel_date": self.travel_date.isoformat() if self.travel_date else None,
+            "num_adults": self.num_adults,
+            "num_children": self.num_children,
+            "final_amount": float(self.final_amount),
+            "status": self.status,
+            "payment_status": self.payment_status,
+            "booking_date": self.booking_date.isoformat() if self.booking_date else None
+        }
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -131,6 +204,9 @@ class Booking(db.Model):
 
 class Invoice(db.Model):
     __tablename__ = "invoices"
+    __table_args__ = (
+        db.Index("ix_invoices_invoice_date_id", "invoice_date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
@@ -177,4 +253,60 @@ class Invoice(db.Model):
         }
 
 
+class BookingDailyRollup(db.Model):
+    """
+    Per-day booking counters by status and package type.
+
+    Maintained incrementally on every booking insert/update/delete and
+    rebuilt from the bookings table by rebuild_analytics.py
+    (see app/services/analytics.py).
+    """
+    __tablename__ = "booking_daily_rollups"
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    package_type = db.Column(db.String(100), primary_key=True, default="")  # '' when the booking has none
+    count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+
+class EmailOutbox(db.Model):
+    """
+    Outgoing emails waiting for delivery.
+
+    Request handlers add rows in their own transaction; email_worker.py
+    drains them with retries (see app/services/email_outbox.py).
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=True)  # cleared once sent or failed
+
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "to_email": self.to_email,
+            "subject": self.subject,
+            "status": self.status,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None
+        }
+
+
 # Note: Tour and Visa models removed - bookings store order details directly
@@ -0,0 +1,198 @@
+"""
+Keyset (cursor) pagination helpers.
+
+List endpoints keep their limit/offset behaviour by default. Passing a
+`cursor` query parameter (empty for the first page) switches them to
+keyset pagination: each page is fetched with a row comparison on the sort
+key, e.g. `(booking_date, id) < (:last_date, :last_id)`, so deep pages
+cost the same as the first one and no count() is needed.
+
+The total is only computed on request via `total=exact` (COUNT) or
+`total=estimate` (planner row estimate from EXPLAIN, which is derived from
+pg_class.reltuples and column statistics).
+"""
+
+import base64
+import bisect
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import tuple_
+from app.extensions import db
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+
+
+class InvalidLimit(ValueError):
+    """Raised when a keyset page is requested with a limit below 1"""
+
+
+def _check_limit(limit):
+    if limit is None or limit < 1:
+        raise InvalidLimit("limit must be at least 1")
+
+
+def encode_cursor(values):
+    """Encode sort-key values into an opaque URL-safe token"""
+    encoded = [
+        value.isoformat() if isinstance(value, (date, datetime))
+        else str(value) if isinstance(value, Decimal)
+        else value
+        for value in values
+    ]
+    raw = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, types=None):
+    """
+    Decode a cursor token.
+
+    Args:
+        token: Value produced by encode_cursor()
+        types: Optional python types to coerce each value to
+
+    Returns:
+        list: Sort-key values
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e))
+
+    if not isinstance(values, list) or (types and len(values) != len(types)):
+        raise InvalidCursor("Malformed cursor")
+    if not types:
+        return values
+
+    try:
+        return [_coerce(value, type_) for value, type_ in zip(values, types)]
+    except (ValueError, TypeError, ArithmeticError) as e:
+        raise InvalidCursor(str(e))
+
+
+def _coerce(value, type_):
+    if value is None:
+        return None
+    if type_ is datetime:
+        return datetime.fromisoformat(value)
+    if type_ is date:
+        return date.fromisoformat(value)
+    if type_ is Decimal:
+        return Decimal(value)
+    return type_(value)
+
+
+def keyset_page(query, columns, cursor, limit, descending=True):
+    """
+    Fetch one page of `query` ordered by `columns` (a unique sort key).
+
+    Args:
+        query: SQLAlchemy ORM query (any existing ORDER BY is replaced)
+        columns: Mapped columns forming the key, e.g. [Booking.booking_date, Booking.id]
+        cursor: Token from a previous page's next_cursor, or "" for the first page
+        limit: Page size
+        descending: Sort direction for all key columns
+
+    Returns:
+        tuple: (rows, next_cursor or None)
+
+    Raises:
+        InvalidCursor, InvalidLimit
+    """
+    _check_limit(limit)
+    if cursor:
+        last = decode_cursor(cursor, [column.type.python_type for column in columns])
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*last) if descending else key > tuple_(*last))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(None).order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor([getattr(last_row, column.key) for column in columns])
+
+    return rows, next_cursor
+
+
+def _sortable(values):
+    """Comparable form of sort-key values, None sorting last"""
+    return tuple((True, 0) if value is None else (False, value) for value in values)
+
+
+def keyset_slice(items, key, cursor, limit, ordered=True):
+    """
+    Keyset pagination over an already ordered in-memory list.
+
+    Args:
+        items: List (e.g. tours from the in-memory catalog)
+        key: Function returning the unique sort-key values of an item
+        cursor: Token from a previous page's next_cursor, or "" for the first page
+        limit: Page size
+        ordered: True if items are ascending by key (None values last); the
+                 page start is then found by binary search, and a cursor
+                 item that has since disappeared still resumes in place.
+                 Otherwise (e.g. relevance-ranked results) the cursor item
+                 is looked up by a scan.
+
+    Returns:
+        tuple: (items, next_cursor or None)
+
+    Raises:
+        InvalidCursor, InvalidLimit
+    """
+    _check_limit(limit)
+    start = 0
+    if cursor:
+        last = decode_cursor(cursor)
+        if ordered:
+            try:
+                start = bisect.bisect_right(items, _sortable(last), key=lambda item: _sortable(key(item)))
+            except TypeError:  # cursor values of the wrong type
+                raise InvalidCursor("Cursor does not match the sort key")
+        else:
+            for position, item in enumerate(items):
+                if list(key(item)) == last:
+                    start = position + 1
+                    break
+            else:
+                raise InvalidCursor("Cursor does not match any item")
+
+    page = items[start:start + limit]
+    next_cursor = None
+    if start + limit < len(items):
+        next_cursor = encode_cursor(key(page[-1]))
+
+    return page, next_cursor
+
+
+def count_total(query, mode="exact"):
+    """
+    Count the rows matched by `query`.
+
+    Args:
+        mode: "exact" runs COUNT(*); "estimate" uses the planner's row
+              estimate (PostgreSQL only, falls back to exact elsewhere);
+              anything else skips counting and returns None
+    """
+    query = query.order_by(None)
+
+    if mode == "estimate" and db.engine.dialect.name == "postgresql":
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        plan = db.session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    if mode in ("exact", "estimate"):
+        return query.count()
+
+    return None
@@ -0,0 +1,233 @@
+"""
+Analytics Rollup Service
+========================
+Keeps booking_daily_rollups in step with the bookings table so admin
+analytics read a few hundred pre-aggregated rows instead of grouping the
+raw bookings on every request.
+
+Every flush that inserts, updates or deletes a Booking is turned into
+count/revenue deltas per (day, status, package_type), which are upserted
+in the same transaction. Bulk inserts and updates report their rows
+through AnalyticsService.record_bulk_changes(); other bulk statements that bypass
+the ORM must call AnalyticsService.rebuild() (or rebuild_analytics.py).
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import bindparam, event, func, delete, select, inspect, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import Booking, BookingDailyRollup
+
+_ROLLUP_ATTRS = ("booking_date", "status", "package_type", "final_amount")
+
+
+def _day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _amount(value):
+    return Decimal(str(value or 0))
+
+
+def _old_values(booking):
+    """Values of the rollup attributes as last loaded from the database"""
+    state = inspect(booking)
+    values = []
+    for name in _ROLLUP_ATTRS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(getattr(booking, name))
+    return values
+
+
+def _new_values(booking):
+    return [getattr(booking, name) for name in _ROLLUP_ATTRS]
+
+
+def _add_delta(deltas, values, sign):
+    booking_date, status, package_type, final_amount = values
+    key = (_day(booking_date), status, package_type or "")
+    count, revenue = deltas.get(key, (0, Decimal("0")))
+    deltas[key] = (count + sign, revenue + sign * _amount(final_amount))
+
+
+def _update_then_insert(connection, rows):
+    """
+    Portable upsert for dialects without ON CONFLICT: add each delta to its
+    row, inserting the rows that did not exist yet. Two transactions
+    creating the same new row at once can still conflict on the primary
+    key here, unlike with ON CONFLICT.
+    """
+    table = BookingDailyRollup.__table__
+    stmt = update(table).where(
+        table.c.day == bindparam("k_day"),
+        table.c.status == bindparam("k_status"),
+        table.c.package_type == bindparam("k_package_type"),
+    ).values(
+        count=table.c.count + bindparam("d_count", type_=table.c.count.type),
+        revenue=table.c.revenue + bindparam("d_revenue", type_=table.c.revenue.type),
+    )
+
+    missing = []
+    for row in rows:
+        result = connection.execute(stmt, {
+            "k_day": row["day"], "k_status": row["status"], "k_package_type": row["package_type"],
+            "d_count": row["count"], "d_revenue": row["revenue"],
+        })
+        if result.rowcount == 0:
+            missing.append(row)
+    if missing:
+        connection.execute(table.insert(), missing)
+
+
+def _upsert(connection, rows):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(BookingDailyRollup)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(BookingDailyRollup)
+    else:
+        _update_then_insert(connection, rows)
+        return
+
+    table = BookingDailyRollup.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "status", "package_type"],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "revenue": table.c.revenue + stmt.excluded.revenue
+        }
+    )
+    connection.execute(stmt, rows)
+
+
+def _write_deltas(connection, deltas):
+    rows = [
+        {"day": day, "status": status, "package_type": package_type,
+         "count": count, "revenue": revenue}
+        for (day, status, package_type), (count, revenue) in deltas.items()
+        if count or revenue
+    ]
+    if rows:
+        _upsert(connection, rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_booking_changes(session, flush_context):
+    deltas = {}
+
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            _add_delta(deltas, _new_values(obj), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            _add_delta(deltas, _old_values(obj), -1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Booking) and session.is_modified(obj):
+            old, new = _old_values(obj), _new_values(obj)
+            if old != new:
+                _add_delta(deltas, old, -1)
+                _add_delta(deltas, new, 1)
+
+    _write_deltas(session.connection(), deltas)
+
+
+class AnalyticsService:
+    """Service for reading and rebuilding booking rollups"""
+
+    @staticmethod
+    def rebuild():
+        """
+        Recompute all rollups from the bookings table (backfill / repair).
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        day = func.date(Booking.booking_date)
+        package_type = func.coalesce(Booking.package_type, "")
+        source = select(
+            day, Booking.status, package_type,
+            func.count(Booking.id), func.coalesce(func.sum(Booking.final_amount), 0)
+        ).group_by(day, Booking.status, package_type)
+
+        db.session.execute(delete(BookingDailyRollup))
+        result = db.session.execute(
+            BookingDailyRollup.__table__.insert().from_select(
+                ["day", "status", "package_type", "count", "revenue"], source
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def record_bulk_changes(inserted=(), deleted=()):
+        """
+        Add rollup deltas for bookings written with bulk INSERT/UPDATE
+        statements, which the flush listener does not see. An update is the
+        old values deleted plus the new values inserted. Runs in the
+        caller's transaction.
+
+        Args:
+            inserted: Booking value dicts to add
+            deleted: Booking value dicts to remove
+        """
+        deltas = {}
+        for rows, sign in ((inserted, 1), (deleted, -1)):
+            for row in rows:
+                _add_delta(deltas, [row.get(name) for name in _ROLLUP_ATTRS], sign)
+        _write_deltas(db.session.connection(), deltas)
+
+    @staticmethod
+    def daily(start_date, end_date=None):
+        """Booking count and revenue per day in [start_date, end_date]"""
+        query = db.session.query(
+            BookingDailyRollup.day,
+            func.sum(BookingDailyRollup.count).label("count"),
+            func.sum(BookingDailyRollup.revenue).label("revenue")
+        ).filter(BookingDailyRollup.day >= start_date)
+
+        if end_date:
+            query = query.filter(BookingDailyRollup.day <= end_date)
+
+        return query.group_by(BookingDailyRollup.day) \
+            .having(func.sum(BookingDailyRollup.count) > 0) \
+            .order_by(BookingDailyRollup.day).all()
+
+    @staticmethod
+    def by_status(start_date=None, end_date=None):
+        """Booking count per status (all time unless a range is given)"""
+        query = db.session.query(
+            BookingDailyRollup.status,
+            func.sum(BookingDailyRollup.count).label("count")
+        )
+        query = AnalyticsService._in_range(query, start_date, end_date)
+        return query.group_by(BookingDailyRollup.status) \
+            .having(func.sum(BookingDailyRollup.count) > 0).all()
+
+    @staticmethod
+    def by_package_type(start_date=None, end_date=None):
+        """Booking count and revenue per package type (all time unless a range is given)"""
+        query = db.session.query(
+            BookingDailyRollup.package_type,
+            func.sum(BookingDailyRollup.count).label("count"),
+            func.sum(BookingDailyRollup.revenue).label("revenue")
+        )
+        query = AnalyticsService._in_range(query, start_date, end_date)
+        return query.group_by(BookingDailyRollup.package_type) \
+            .having(func.sum(BookingDailyRollup.count) > 0).all()
+
+    @staticmethod
+    def _in_range(query, start_date, end_date):
+        if start_date:
+            query = query.filter(BookingDailyRollup.day >= start_date)
+        if end_date:
+            query = query.filter(BookingDailyRollup.day <= end_date)
+        return query
@@ -0,0 +1,87 @@
+"""
+Cache Service
+=============
+Small in-process TTL cache plus commit-driven invalidation.
+
+invalidate_on_commit(cache, Model, ...) clears a cache after any session
+commit that inserted, updated or deleted an instance of one of the given
+models. Bulk query.update()/delete() statements bypass the unit of work,
+so code using them should call notify_changed() itself.
+"""
+
+import threading
+import time
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# [(callback, (Model, ...)), ...]
+_watchers = []
+
+
+class TTLCache:
+    """Thread-safe key/value cache with per-entry expiry"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        """Cache a value for ttl seconds (ttl <= 0 disables caching)"""
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def on_commit(callback, *models):
+    """Call callback(changed_models) after commits touching any of models"""
+    _watchers.append((callback, models))
+
+
+def invalidate_on_commit(cache, *models):
+    """Clear cache after commits touching any of models"""
+    on_commit(lambda changed: cache.clear(), *models)
+
+
+def notify_changed(*models):
+    """Run the watchers for models changed outside the ORM unit of work"""
+    changed = set(models)
+    for callback, watched in _watchers:
+        if any(issubclass(model, watched) for model in changed):
+            callback(changed)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_models(session, flush_context):
+    changed = session.info.setdefault("changed_models", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        changed.add(type(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_changed_models(session):
+    changed = session.info.pop("changed_models", None)
+    if changed:
+        notify_changed(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_models(session):
+    session.info.pop("changed_models", None)
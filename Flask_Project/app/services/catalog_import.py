@@ -0,0 +1,223 @@
+"""
+Tour Catalog Import
+===================
+Merges a new tour scrape into the catalog file (TOUR_CATALOG_PATH) that
+TourCatalog serves from memory.
+
+Records are matched by tour code, like an INSERT ... ON CONFLICT (code)
+DO UPDATE: new codes are inserted, existing codes are replaced only when
+the content hash of their normalized record changed, and tours missing
+from the scrape are kept. The source is streamed record by record with
+ijson when it is installed (json.load otherwise).
+
+The merged catalog is written to a temporary file and renamed over the
+old one, so a worker reloading at the same time reads either the old or
+the new catalog, never a partial file. Nothing is written when no tour
+changed or in dry-run mode.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from .tour_catalog import TOUR_FIELDS, TOUR_TYPES, _build_tour
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:  # optional dependency, sources are loaded in one piece
+    ijson = None
+
+
+def _parse_events(f, path):
+    try:
+        yield from ijson.parse(f, use_float=True)
+    except ijson.JSONError as e:
+        raise ValueError(f"Invalid JSON in {path}: {str(e).splitlines()[0]}") from e
+
+
+def _iter_document(path):
+    """
+    Yield ("metadata", None, metadata) and ("tour", (tour_type, category), raw)
+    items from a catalog/scrape file.
+    """
+    if ijson is None:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield "metadata", None, data.get("metadata") or {}
+        for tour_type, groups in (data.get("data") or {}).items():
+            for category, tours in groups.items():
+                for raw in tours:
+                    yield "tour", (tour_type, category), raw
+        return
+
+    tour_type = category = None
+    builder = builder_prefix = None
+
+    with open(path, "rb") as f:
+        for prefix, event, value in _parse_events(f, path):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == builder_prefix and event in ("end_map", "end_array"):
+                    if builder_prefix == "metadata":
+                        yield "metadata", None, builder.value
+                    else:
+                        yield "tour", (tour_type, category), builder.value
+                    builder = None
+                continue
+
+            if event == "map_key" and prefix == "data":
+                tour_type = value
+            elif event == "map_key" and prefix == f"data.{tour_type}":
+                category = value
+            elif (event == "start_map" and
+                  prefix in ("metadata", f"data.{tour_type}.{category}.item")):
+                builder, builder_prefix = ObjectBuilder(), prefix
+                builder.event(event, value)
+
+
+class CatalogImportService:
+    """Hash-based upsert of scraped tours into the catalog file"""
+
+    @staticmethod
+    def record_hash(tour):
+        """Content hash of a normalized tour (see tour_catalog._build_tour)"""
+        body = json.dumps(tour, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def read(path):
+        """
+        Read a catalog/scrape file into {code: entry}, in file order.
+
+        Entries are dicts with tour_type, category, raw, tour (normalized)
+        and hash. Records without a code are partial duplicates left by the
+        scraper and are skipped; the first record seen for a code wins, as
+        in TourCatalog.load_data().
+
+        Returns:
+            tuple: (metadata, entries, number of skipped records)
+        """
+        metadata, entries, skipped = {}, {}, 0
+
+        for kind, key, value in _iter_document(path):
+            if kind == "metadata":
+                metadata = value
+                continue
+            if not value.get("code"):
+                skipped += 1
+                continue
+
+            tour = _build_tour(value, *key)
+            if tour["code"] in entries:
+                skipped += 1
+                continue
+            entries[tour["code"]] = {
+                "tour_type": key[0],
+                "category": key[1],
+                "raw": value,
+                "tour": tour,
+                "hash": CatalogImportService.record_hash(tour),
+            }
+
+        return metadata, entries, skipped
+
+    @staticmethod
+    def diff(current, incoming):
+        """
+        Compare two {code: entry} maps.
+
+        Returns:
+            dict: inserted/updated/unchanged/missing code lists, and the
+                  changed field names of each updated code
+        """
+        result = {"inserted": [], "updated": [], "unchanged": [], "missing": [], "changed_fields": {}}
+
+        for code, entry in incoming.items():
+            existing = current.get(code)
+            if existing is None:
+                result["inserted"].append(code)
+            elif existing["hash"] != entry["hash"]:
+                result["updated"].append(code)
+                result["changed_fields"][code] = [
+                    field for field in TOUR_FIELDS
+                    if existing["tour"][field] != entry["tour"][field]
+                ]
+            else:
+                result["unchanged"].append(code)
+
+        result["missing"] = [code for code in current if code not in incoming]
+        return result
+
+    @staticmethod
+    def merge(current, incoming, diff):
+        """Apply inserted and updated entries; unchanged and missing tours keep their record"""
+        merged = dict(current)
+        for code in diff["inserted"] + diff["updated"]:
+            merged[code] = incoming[code]
+        return merged
+
+    @staticmethod
+    def build_document(entries, metadata):
+        """Group entries back into the {"metadata", "data"} catalog layout"""
+        data = {tour_type: {} for tour_type in TOUR_TYPES}
+        for entry in entries.values():
+            groups = data.setdefault(entry["tour_type"], {})
+            groups.setdefault(entry["category"], []).append(entry["raw"])
+
+        metadata = dict(metadata)
+        metadata.update(
+            total_tours=len(entries),
+            domestic_tours=sum(len(tours) for tours in data["domestic"].values()),
+            international_tours=sum(len(tours) for tours in data["international"].values()),
+            domestic_states=list(data["domestic"].keys()),
+            international_regions=list(data["international"].keys()),
+            imported_at=datetime.utcnow().isoformat(),
+        )
+        return {"metadata": metadata, "data": data}
+
+    @staticmethod
+    def write_atomic(path, document):
+        """Write JSON to a temporary file next to `path`, then rename it into place"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".catalog-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(document, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def import_file(source_path, catalog_path, dry_run=False):
+        """
+        Upsert the tours in `source_path` into the catalog at `catalog_path`.
+
+        A missing catalog file is treated as empty.
+
+        Returns:
+            dict: diff() result plus skipped (source records without a
+                  usable code) and written (whether the catalog changed)
+        """
+        current_metadata, current = {}, {}
+        if os.path.exists(catalog_path):
+            current_metadata, current, _ = CatalogImportService.read(catalog_path)
+
+        metadata, incoming, skipped = CatalogImportService.read(source_path)
+        result = CatalogImportService.diff(current, incoming)
+        result["skipped"] = skipped
+        result["written"] = False
+
+        if dry_run or not (result["inserted"] or result["updated"]):
+            return result
+
+        merged = CatalogImportService.merge(current, incoming, result)
+        document = CatalogImportService.build_document(merged, {**current_metadata, **metadata})
+        CatalogImportService.write_atomic(catalog_path, document)
+        result["written"] = True
+        return result
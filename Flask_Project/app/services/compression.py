@@ -0,0 +1,135 @@
+"""
+Compression Service
+===================
+Compresses JSON/text responses above COMPRESS_MIN_SIZE bytes with the best
+encoding the client accepts: brotli (when the Brotli package is installed),
+then gzip.
+
+Fixed payloads whose strong ETag covers the whole resource (the structured
+tour catalog) are marked with cache_variants() by their view: they are
+compressed once per ETag and encoding at the highest quality and served
+from an in-memory LRU afterwards, so the same catalog bytes are never
+compressed twice. Everything else, including query-dependent tour lists
+whose ETag changes with every query string, is compressed per request at a
+faster setting, so arbitrary URLs can neither trigger the slow setting nor
+evict the cached catalog.
+
+Compressed responses get a weak ETag (W/"..."): the bytes differ from the
+identity body, but If-None-Match uses weak comparison, so 304s keep working
+for clients that saw either representation.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/csv", "text/html", "text/plain"}
+
+# Dynamic responses favour speed, cached variants favour size
+_DYNAMIC_LEVELS = {"br": 5, "gzip": 6}
+_CACHED_LEVELS = {"br": 11, "gzip": 9}
+
+
+def _compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def cache_variants(response):
+    """Mark a public response with a strong, catalog-wide ETag for the variant cache"""
+    response.cache_compressed_variants = True
+    return response
+
+
+def _choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+class CompressedVariants:
+    """Bounded LRU of compressed bodies keyed by (ETag, encoding)"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, etag, encoding, data):
+        key = (etag, encoding)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+
+        body = _compress(data, encoding, _CACHED_LEVELS[encoding])
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _compress_response(response):
+    app = current_app
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < app.config.get("COMPRESS_MIN_SIZE", 1024):
+        return response
+
+    etag, weak = response.get_etag()
+    cacheable = (etag and not weak
+                 and getattr(response, "cache_compressed_variants", False))
+    if cacheable:
+        body = app.extensions["compressed_variants"].get_or_compress(etag, encoding, data)
+    else:
+        body = _compress(data, encoding, _DYNAMIC_LEVELS[encoding])
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """
+    Enable response compression (COMPRESS_ENABLED).
+
+    Call before registering other after_request hooks that set headers
+    this layer reads (Cache-Control): Flask runs after_request hooks in
+    reverse order, so this one must be registered first to run last.
+    """
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+
+    app.extensions["compressed_variants"] = CompressedVariants(
+        app.config.get("COMPRESS_CACHE_ENTRIES", 256)
+    )
+    app.after_request(_compress_response)
@@ -0,0 +1,115 @@
+"""
+Database Pool Settings
+======================
+Builds SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* / DB_STATEMENT_TIMEOUT_MS
+settings in config.py and rejects invalid values when the app starts,
+instead of at the first request that needs a connection.
+
+Each worker process has its own pool. A worker needs one connection per
+request thread, plus one per background thread that talks to the database
+(export jobs, the inline email outbox worker); connections_per_worker()
+is that number, and gunicorn.conf.py checks that the pool can hold it.
+
+Pools are InstrumentedQueuePool: functions registered with
+add_pool_observer() are told how long each checkout waited and when
+connections are returned (used for the /metrics pool series).
+"""
+
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# observer(pool, wait_seconds, timed_out, checked_out); wait_seconds is None on checkin
+_pool_observers = []
+
+
+def add_pool_observer(observer):
+    if observer not in _pool_observers:
+        _pool_observers.append(observer)
+
+
+def _notify(pool, wait, timed_out=False, checked_out=None):
+    if checked_out is None:
+        checked_out = pool.checkedout()
+    for observer in _pool_observers:
+        observer(pool, wait, timed_out, checked_out)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout waits and checkins to pool observers"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        event.listen(self, "checkin", self._on_checkin)
+
+    def _on_checkin(self, dbapi_connection, record):
+        # Fired just before the connection goes back into the pool
+        _notify(self, None, checked_out=self.checkedout() - 1)
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            _notify(self, time.perf_counter() - start, timed_out=True)
+            raise
+        _notify(self, time.perf_counter() - start)
+        return connection
+
+
+def connections_per_worker(config, threads):
+    """Connections a worker process with `threads` request threads may hold at once"""
+    needed = threads + config.get("EXPORT_JOB_WORKERS", 0)
+    if config.get("EMAIL_OUTBOX_INLINE_WORKER"):
+        needed += config.get("EMAIL_OUTBOX_WORKERS", 0)
+    return needed
+
+
+def validate_pool_config(config):
+    """Raise ValueError if a pool setting is out of range"""
+    errors = []
+    if config.get("DB_POOL_SIZE", 1) < 1:
+        errors.append("DB_POOL_SIZE must be at least 1")
+    if config.get("DB_MAX_OVERFLOW", 0) < 0:
+        errors.append("DB_MAX_OVERFLOW must not be negative")
+    if config.get("DB_POOL_TIMEOUT", 1) <= 0:
+        errors.append("DB_POOL_TIMEOUT must be positive")
+    if config.get("DB_POOL_RECYCLE", -1) == 0 or config.get("DB_POOL_RECYCLE", -1) < -1:
+        errors.append("DB_POOL_RECYCLE must be positive seconds (or -1 to disable)")
+    if config.get("DB_STATEMENT_TIMEOUT_MS", 0) < 0:
+        errors.append("DB_STATEMENT_TIMEOUT_MS must not be negative (0 disables it)")
+    if errors:
+        raise ValueError("Invalid database pool settings: " + "; ".join(errors))
+
+
+def engine_options(config):
+    """SQLAlchemy create_engine() options for the configured database"""
+    backend = make_url(config["SQLALCHEMY_DATABASE_URI"]).get_backend_name()
+
+    options = {
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", -1),
+    }
+    # SQLite uses a single-connection pool that takes no sizing arguments
+    if backend != "sqlite":
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=config.get("DB_POOL_SIZE", 5),
+            max_overflow=config.get("DB_MAX_OVERFLOW", 10),
+            pool_timeout=config.get("DB_POOL_TIMEOUT", 30),
+        )
+
+    statement_timeout = config.get("DB_STATEMENT_TIMEOUT_MS", 0)
+    if backend == "postgresql" and statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={int(statement_timeout)}"}
+
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS entries win over the DB_POOL_* values
+    options.update(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    return options
+
+
+def init_db_pool(app):
+    """Validate the pool settings and apply them; call before db.init_app()"""
+    validate_pool_config(app.config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
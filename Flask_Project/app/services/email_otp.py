@@ -1,14 +1,14 @@
 """
 Email OTP Service
 =================
-Handles OTP generation, email sending via Resend, and verification.
+Handles OTP generation, queuing the verification email, and verification.
+Emails are delivered by the outbox worker (see email_outbox.py).
 """
 
 import random
-import resend
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask import current_app
+from app.services.email_outbox import EmailOutboxService
+from app.services.password_hashing import PasswordHashingService
 
 
 class EmailOTPService:
@@ -23,13 +23,13 @@ class EmailOTPService:
 
     @staticmethod
     def hash_otp(otp):
-        """Hash OTP for secure storage"""
-        return generate_password_hash(otp)
+        """Hash OTP for secure storage (keyed HMAC, see password_hashing.py)"""
+        return PasswordHashingService.hash_otp(otp)
 
     @staticmethod
     def verify_otp(stored_hash, user_otp):
         """Verify user-provided OTP against stored hash"""
-        return check_password_hash(stored_hash, user_otp)
+        return PasswordHashingService.verify_otp(stored_hash, user_otp)
 
     @staticmethod
     def is_otp_expired(otp_created_at):
@@ -40,24 +40,17 @@ class EmailOTPService:
         return datetime.utcnow() > expiry_time
 
     @staticmethod
-    def send_otp_email(email, otp):
+    def queue_otp_email(email, otp):
         """
-        Send OTP verification email via Resend.
+        Add the OTP verification email to the outbox.
 
-        Returns:
-            dict: {"success": True/False, "error": str or None}
+        The email is sent once the caller commits the session, so the OTP
+        hash and the queued email are saved together.
         """
-        resend.api_key = current_app.config.get("RESEND_API_KEY")
-
-        if not resend.api_key:
-            return {"success": False, "error": "Resend API key not configured"}
-
-        try:
-            params: resend.Emails.SendParams = {
-                "from": "Waynex Travels <Auth@verify.waynextravels.com>",
-                "to": [email],
-                "subject": "Your Waynex Travels verification code",
-                "html": f"""
+        return EmailOutboxService.enqueue(
+            email,
+            "Your Waynex Travels verification code",
+            f"""
                 <div style="font-family: Arial, Helvetica, sans-serif; background:#f4f6f8; padding:40px 0;">
                   <div style="max-width:520px;margin:auto;background:white;border-radius:10px;padding:30px;">
 
@@ -96,13 +89,5 @@ class EmailOTPService:
 
                   </div>
                 </div>
-                """,
-            }
-
-            result = resend.Emails.send(params)
-            print(f"[EmailOTP] OTP sent to {email}: {result}")
-            return {"success": True, "error": None}
-
-        except Exception as e:
-            print(f"[EmailOTP] Failed to send OTP to {email}: {str(e)}")
-            return {"success": False, "error": str(e)}
+                """
+        )
@@ -0,0 +1,242 @@
+"""
+Email Outbox Service
+====================
+Decouples request handlers from the email provider. Handlers add an
+EmailOutbox row in their own transaction and return; a worker pool drains
+the table in batches, retrying failed deliveries with exponential backoff.
+
+Workers claim rows with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+worker threads or processes (email_worker.py, or the in-process worker
+enabled by EMAIL_OUTBOX_INLINE_WORKER) can share one outbox.
+
+Delivery goes through a pluggable transport picked by EMAIL_TRANSPORT:
+"resend" (Resend batch API) or "local" (kept in memory, for tests and
+local development).
+"""
+
+import threading
+import time
+import traceback
+import resend
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.extensions import db
+from app.models import EmailOutbox
+from app.services.cache import on_commit
+from app.services.perf import timed
+from app.services.metrics import observe_email_delivered, observe_email_send
+
+SENDER = "Waynex Travels <Auth@verify.waynextravels.com>"
+
+
+class ResendTransport:
+    """Sends through the Resend batch API"""
+
+    max_batch_size = 100  # Resend batch limit
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+    def send(self, messages):
+        """Send a list of {"to", "subject", "html"} dicts; raises on failure"""
+        if not self.api_key:
+            raise RuntimeError("Resend API key not configured")
+
+        resend.api_key = self.api_key
+        result = resend.Batch.send([
+            {
+                "from": SENDER,
+                "to": [message["to"]],
+                "subject": message["subject"],
+                "html": message["html"],
+            }
+            for message in messages
+        ])
+        print(f"[EmailOutbox] Sent {len(messages)} email(s) via Resend: {result}")
+
+
+class LocalTransport:
+    """Keeps sent messages in memory instead of delivering them"""
+
+    max_batch_size = 100
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, messages):
+        self.sent.extend(messages)
+        for message in messages:
+            print(f"[EmailOutbox] (local) {message['subject']} -> {message['to']}")
+
+
+TRANSPORTS = {
+    "resend": lambda app: ResendTransport(app.config.get("RESEND_API_KEY")),
+    "local": lambda app: LocalTransport(),
+}
+
+
+def get_transport(app):
+    """The app's transport, created on first use from EMAIL_TRANSPORT"""
+    transport = app.extensions.get("email_transport")
+    if transport is None:
+        name = app.config.get("EMAIL_TRANSPORT", "resend")
+        if name not in TRANSPORTS:
+            raise ValueError(f"Unknown EMAIL_TRANSPORT: {name}")
+        transport = app.extensions["email_transport"] = TRANSPORTS[name](app)
+    return transport
+
+
+class EmailOutboxService:
+    """Service for queuing and delivering outgoing emails"""
+
+    @staticmethod
+    def enqueue(to_email, subject, html):
+        """
+        Add an email to the outbox. It is delivered after the session commits.
+
+        Returns:
+            EmailOutbox: The queued message
+        """
+        message = EmailOutbox(to_email=to_email, subject=subject, html=html)
+        db.session.add(message)
+        return message
+
+    @staticmethod
+    def retry_delay(app, attempts):
+        """Seconds to wait before retry number `attempts`"""
+        base = app.config.get("EMAIL_OUTBOX_RETRY_BASE", 5)
+        cap = app.config.get("EMAIL_OUTBOX_RETRY_MAX", 60)
+        return min(base * 2 ** (attempts - 1), cap)
+
+    @staticmethod
+    def process_batch(app, transport=None):
+        """
+        Claim and send one batch of due messages.
+
+        Must run inside an app context.
+
+        Returns:
+            int: Number of messages claimed (0 when the outbox is idle)
+        """
+        transport = transport or get_transport(app)
+        batch_size = min(app.config.get("EMAIL_OUTBOX_BATCH_SIZE", 50), transport.max_batch_size)
+        now = datetime.utcnow()
+
+        messages = EmailOutbox.query \
+            .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now) \
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id) \
+            .limit(batch_size) \
+            .with_for_update(skip_locked=True) \
+            .all()
+
+        if not messages:
+            db.session.rollback()  # release the snapshot between polls
+            return 0
+
+        transport_name = app.config.get("EMAIL_TRANSPORT", "resend")
+        send_start = time.perf_counter()
+        try:
+            with timed("email"):
+                transport.send([
+                    {"to": m.to_email, "subject": m.subject, "html": m.html}
+                    for m in messages
+                ])
+        except Exception as e:
+            observe_email_send(transport_name, time.perf_counter() - send_start, ok=False)
+            print(f"[EmailOutbox] Failed to send {len(messages)} email(s): {str(e)}")
+            max_attempts = app.config.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+            for message in messages:
+                message.attempts += 1
+                message.last_error = str(e)
+                if message.attempts >= max_attempts:
+                    message.status = "failed"
+                    message.html = None  # never sent, but don't keep OTP codes either
+                else:
+                    delay = EmailOutboxService.retry_delay(app, message.attempts)
+                    message.next_attempt_at = now + timedelta(seconds=delay)
+        else:
+            observe_email_send(transport_name, time.perf_counter() - send_start, ok=True)
+            sent_at = datetime.utcnow()
+            for message in messages:
+                observe_email_delivered((sent_at - message.created_at).total_seconds())
+                message.attempts += 1
+                message.status = "sent"
+                message.sent_at = sent_at
+                message.html = None  # don't keep OTP codes around
+                message.last_error = None
+
+        db.session.commit()
+        return len(messages)
+
+    @staticmethod
+    def drain(app, transport=None):
+        """Send batches until nothing is due. Returns the number of messages claimed."""
+        total = 0
+        while True:
+            claimed = EmailOutboxService.process_batch(app, transport)
+            if not claimed:
+                return total
+            total += claimed
+
+    @staticmethod
+    def stats():
+        """Message count per status"""
+        rows = db.session.query(EmailOutbox.status, func.count(EmailOutbox.id)) \
+            .group_by(EmailOutbox.status).all()
+        return {status: count for status, count in rows}
+
+
+class OutboxWorker:
+    """
+    Pool of threads draining the outbox.
+
+    Each thread polls every EMAIL_OUTBOX_POLL_INTERVAL seconds and wakes
+    immediately after a commit that queued new email in this process.
+    """
+
+    def __init__(self, app, num_threads=None):
+        self.app = app
+        self.num_threads = num_threads or app.config.get("EMAIL_OUTBOX_WORKERS", 2)
+        self.poll_interval = app.config.get("EMAIL_OUTBOX_POLL_INTERVAL", 2)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        on_commit(lambda changed: self.wake(), EmailOutbox)
+        for i in range(self.num_threads):
+            thread = threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"[EmailOutbox] Started {self.num_threads} worker thread(s)")
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            claimed = 0
+            with self.app.app_context():
+                try:
+                    claimed = EmailOutboxService.process_batch(self.app)
+                except Exception as e:
+                    traceback.print_exc()
+                    print(f"[EmailOutbox] Worker error: {str(e)}")
+                    db.session.rollback()
+
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def init_email_outbox(app):
+    """Start the in-process worker when EMAIL_OUTBOX_INLINE_WORKER is set"""
+    if app.config.get("EMAIL_OUTBOX_INLINE_WORKER"):
+        app.extensions["email_outbox_worker"] = OutboxWorker(app).start()
@@ -0,0 +1,235 @@
+"""
+Export Job Service
+==================
+Runs long report exports in a background thread pool and writes the
+result to disk, so the request that starts an export returns immediately.
+
+Job state is kept in a JSON file next to the output file in
+REPORT_EXPORT_FOLDER, which lets any worker process answer status and
+download requests for a job started by another worker.
+
+Jobs run in the thread pool of the process that submitted them, so they
+die with it (e.g. a gunicorn worker recycled after max_requests). get()
+reports a pending/running job as failed once its owner process is gone
+(checked on the same host) or it has been unfinished for
+EXPORT_JOB_TIMEOUT seconds. Finished jobs, state and file, are deleted
+EXPORT_JOB_TTL seconds after they finish; cleanup() runs on every submit.
+"""
+
+import json
+import os
+import re
+import socket
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from app.services.metrics import observe_export_job
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_STATE_FILE_RE = re.compile(r"^([0-9a-f]{32})\.json$")
+_FINISHED = ("done", "failed")
+
+_executor = None
+
+
+def _age(timestamp):
+    """Seconds since an isoformat UTC timestamp"""
+    return (datetime.utcnow() - datetime.fromisoformat(timestamp)).total_seconds()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, owned by another user
+        return True
+    return True
+
+
+def _get_executor(app):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=app.config.get("EXPORT_JOB_WORKERS", 2),
+            thread_name_prefix="export-job"
+        )
+    return _executor
+
+
+class ExportJobService:
+    """Service for background report exports"""
+
+    @staticmethod
+    def _folder(app=None):
+        app = app or current_app
+        folder = app.config["REPORT_EXPORT_FOLDER"]
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    @staticmethod
+    def _state_path(folder, job_id):
+        return os.path.join(folder, f"{job_id}.json")
+
+    @staticmethod
+    def _save_state(folder, job):
+        path = ExportJobService._state_path(folder, job["id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def submit(kind, extension, builder, **params):
+        """
+        Queue an export job.
+
+        Args:
+            kind: Report name used in the download filename
+            extension: Output file extension (e.g. 'xlsx')
+            builder: Callable builder(output_path, **params) returning a row
+                     count; runs inside an app context on a worker thread
+            params: JSON-serializable builder arguments
+
+        Returns:
+            dict: Job state
+        """
+        app = current_app._get_current_object()
+        folder = ExportJobService._folder(app)
+        job_id = uuid.uuid4().hex
+
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": "pending",
+            "params": params,
+            "file": f"{job_id}.{extension}",
+            "download_name": f'{kind}_{datetime.now().strftime("%Y%m%d")}.{extension}',
+            "rows": None,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "host": socket.gethostname(),
+            "pid": os.getpid()
+        }
+        ExportJobService.cleanup(app)
+        ExportJobService._save_state(folder, job)
+
+        _get_executor(app).submit(ExportJobService._run, app, folder, job, builder)
+        return job
+
+    @staticmethod
+    def _run(app, folder, job, builder):
+        job = dict(job, status="running", started_at=datetime.utcnow().isoformat())
+        ExportJobService._save_state(folder, job)
+
+        output_path = os.path.join(folder, job["file"])
+        start = time.perf_counter()
+        with app.app_context():
+            try:
+                rows = builder(output_path, **job["params"])
+                job.update(status="done", rows=rows)
+            except Exception as e:
+                traceback.print_exc()
+                print(f"[ExportJob] Job {job['id']} failed: {str(e)}")
+                job.update(status="failed", error=str(e))
+            finally:
+                # A job that overran EXPORT_JOB_TIMEOUT may already have been
+                # marked failed (and counted) by get()/cleanup(); keep that
+                # terminal state instead of reviving it
+                current = ExportJobService._load(folder, job["id"])
+                if current is not None and current["status"] == "failed":
+                    print(f"[ExportJob] Job {job['id']} finished after it was marked failed")
+                else:
+                    job["finished_at"] = datetime.utcnow().isoformat()
+                    ExportJobService._save_state(folder, job)
+                    observe_export_job(job["kind"], job["status"], time.perf_counter() - start)
+
+    @staticmethod
+    def get(job_id):
+        """Get job state, or None if the job does not exist"""
+        if not _JOB_ID_RE.match(job_id or ""):
+            return None
+
+        folder = ExportJobService._folder()
+        job = ExportJobService._load(folder, job_id)
+        if job is None or job["status"] in _FINISHED:
+            return job
+
+        error = ExportJobService._abandoned(current_app, job)
+        if error:
+            job.update(status="failed", error=error, finished_at=datetime.utcnow().isoformat())
+            ExportJobService._save_state(folder, job)
+            observe_export_job(job["kind"], "failed", _age(job.get("started_at") or job["created_at"]))
+        return job
+
+    @staticmethod
+    def _load(folder, job_id):
+        path = ExportJobService._state_path(folder, job_id)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _abandoned(app, job):
+        """Why an unfinished job can no longer finish, or None if it still can"""
+        if job.get("host") == socket.gethostname() and job.get("pid") \
+                and not _process_alive(job["pid"]):
+            return "Export worker exited before the job finished"
+        timeout = app.config.get("EXPORT_JOB_TIMEOUT", 3600)
+        if timeout and _age(job.get("started_at") or job["created_at"]) > timeout:
+            return f"Export job did not finish within {timeout} seconds"
+        return None
+
+    @staticmethod
+    def cleanup(app=None):
+        """
+        Delete jobs (state and output file) finished more than EXPORT_JOB_TTL
+        seconds ago; abandoned unfinished jobs are marked failed first.
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        app = app or current_app
+        folder = ExportJobService._folder(app)
+        ttl = app.config.get("EXPORT_JOB_TTL", 86400)
+        deleted = 0
+
+        for name in os.listdir(folder):
+            match = _STATE_FILE_RE.match(name)
+            if not match:
+                continue
+            job = ExportJobService._load(folder, match.group(1))
+            if job is None:
+                continue
+
+            if job["status"] not in _FINISHED:
+                error = ExportJobService._abandoned(app, job)
+                if not error:
+                    continue
+                job.update(status="failed", error=error, finished_at=datetime.utcnow().isoformat())
+                ExportJobService._save_state(folder, job)
+
+            if _age(job.get("finished_at") or job["created_at"]) <= ttl:
+                continue
+            for path in (os.path.join(folder, job["file"]), os.path.join(folder, name)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            deleted += 1
+
+        if deleted:
+            print(f"[ExportJob] Deleted {deleted} expired export job(s)")
+        return deleted
+
+    @staticmethod
+    def file_path(job):
+        """Absolute path of a job's output file"""
+        return os.path.join(ExportJobService._folder(), job["file"])
@@ -0,0 +1,85 @@
+"""
+HTTP Cache Service
+==================
+Cache validators and Cache-Control headers for GET endpoints.
+
+@http_cached() gives a view a strong ETag (and Last-Modified when known) and
+answers If-None-Match / If-Modified-Since with 304 Not Modified:
+
+    @http_cached()                        # ETag = hash of the response body
+    @http_cached(validator=tours_version) # 304 before the view runs
+
+A validator receives the view arguments and returns (version, last_modified)
+for the resource, or None when it cannot tell (e.g. the row does not exist),
+in which case the view runs normally. It must be cheaper than the view and
+identical in every worker process for the same data: a content hash (the
+tour catalog) or a row's updated_at, never an in-process counter, or one
+worker could confirm a stale copy another worker has already replaced.
+
+Cache-Control is set per blueprint from HTTP_CACHE_CONTROL for GET responses
+that don't set their own.
+"""
+
+import hashlib
+from functools import wraps
+from flask import current_app, make_response, request
+from werkzeug.http import is_resource_modified
+
+
+def _etag(version):
+    """Strong ETag for a resource version and the exact request URL"""
+    seed = f"{version}|{request.full_path}"
+    return hashlib.sha256(seed.encode("utf-8")).hexdigest()[:32]
+
+
+def http_cached(validator=None):
+    """Add ETag/Last-Modified validation to a GET view"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = last_modified = None
+
+            if validator is not None:
+                result = validator(*args, **kwargs)
+                if result is not None:
+                    version, last_modified = result
+                    etag = _etag(version)
+                    if not is_resource_modified(request.environ, etag=etag,
+                                                last_modified=last_modified):
+                        response = make_response("", 304)
+                        response.set_etag(etag)
+                        if last_modified:
+                            response.last_modified = last_modified
+                        return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            if etag:
+                response.set_etag(etag)
+            else:
+                response.add_etag()  # hash of the body
+            if last_modified:
+                response.last_modified = last_modified
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def _set_cache_control(response):
+    if request.method not in ("GET", "HEAD") or response.status_code not in (200, 304):
+        return response
+    if "Cache-Control" in response.headers:
+        return response
+
+    policies = current_app.config.get("HTTP_CACHE_CONTROL", {})
+    policy = policies.get(request.blueprint)
+    if policy:
+        response.headers["Cache-Control"] = policy
+    return response
+
+
+def init_http_cache(app):
+    """Apply the per-blueprint Cache-Control policies"""
+    app.after_request(_set_cache_control)
@@ -0,0 +1,82 @@
+"""
+ID Generator Service
+====================
+Booking IDs and invoice numbers without random collisions.
+
+IDs keep the readable date prefix and end in a fixed-width base-36 number
+drawn from a PostgreSQL sequence: BK-YYYYMMDD-00000A7F. A sequence never
+hands out the same value twice, even across worker processes, so there is
+no collision to retry, and numbers only grow, so new IDs sort after old
+ones and inserts append to the right edge of the unique index.
+
+Databases without sequences (SQLite in local development) fall back to a
+per-process counter seeded from the clock, which is unique only within a
+single process.
+"""
+
+import itertools
+import string
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models import booking_number_seq, invoice_number_seq
+
+ID_ALPHABET = string.digits + string.ascii_uppercase  # sorts like the numbers it encodes
+SUFFIX_LENGTH = 8  # 36**8 ~ 2.8 trillion IDs per prefix
+
+_fallback_lock = threading.Lock()
+_fallback_counter = itertools.count(int(time.time() * 1000) - 1_577_836_800_000)  # ms since 2020
+
+
+def encode_suffix(number):
+    """Encode a non-negative number as SUFFIX_LENGTH base-36 characters"""
+    if number < 0 or number >= len(ID_ALPHABET) ** SUFFIX_LENGTH:
+        raise OverflowError(f"ID number out of range: {number}")
+    chars = []
+    for _ in range(SUFFIX_LENGTH):
+        number, digit = divmod(number, len(ID_ALPHABET))
+        chars.append(ID_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _next_numbers(sequence, count):
+    bind = db.session.get_bind()
+    if bind.dialect.supports_sequences:
+        if count == 1:
+            return [db.session.execute(select(sequence.next_value())).scalar_one()]
+        # One round trip for the whole batch
+        stmt = select(sequence.next_value()).select_from(func.generate_series(1, count))
+        return list(db.session.execute(stmt).scalars())
+
+    with _fallback_lock:
+        return [next(_fallback_counter) for _ in range(count)]
+
+
+class IdGenerator:
+    """Service for generating booking IDs and invoice numbers"""
+
+    @staticmethod
+    def generate(prefix, sequence, count=1):
+        """
+        Generate `count` IDs formatted as PREFIX-YYYYMMDD-XXXXXXXX.
+
+        Returns:
+            list: IDs in increasing order
+        """
+        date_str = datetime.now().strftime("%Y%m%d")
+        return [
+            f"{prefix}-{date_str}-{encode_suffix(number)}"
+            for number in sorted(_next_numbers(sequence, count))
+        ]
+
+    @staticmethod
+    def booking_ids(count=1):
+        """Booking IDs: BK-YYYYMMDD-XXXXXXXX (fits Booking.booking_id_str)"""
+        return IdGenerator.generate("BK", booking_number_seq, count)
+
+    @staticmethod
+    def invoice_numbers(count=1):
+        """Invoice numbers: INV-YYYYMMDD-XXXXXXXX"""
+        return IdGenerator.generate("INV", invoice_number_seq, count)
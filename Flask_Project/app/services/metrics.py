@@ -0,0 +1,159 @@
+"""
+Prometheus Metrics
+==================
+Exposes GET /metrics in the Prometheus text format (METRICS_ENABLED,
+requires the prometheus_client package):
+
+    waynex_http_requests_total              by blueprint, endpoint, method, status
+    waynex_http_request_duration_seconds    by blueprint, endpoint
+    waynex_db_queries_per_request           by blueprint
+    waynex_db_pool_checkout_wait_seconds    time to get a pooled connection
+    waynex_db_pool_checkout_timeouts_total  checkouts that hit DB_POOL_TIMEOUT
+    waynex_db_pool_checked_out              connections in use (all workers)
+    waynex_db_pool_overflow                 in use beyond DB_POOL_SIZE (all workers)
+    waynex_email_send_duration_seconds      transport call, by transport and outcome
+    waynex_email_delivery_seconds           queued (OTP requested) to sent
+    waynex_export_job_duration_seconds      by report kind and status
+
+Under gunicorn every worker has its own registry, so gunicorn.conf.py sets
+PROMETHEUS_MULTIPROC_DIR before the app is imported: each worker writes
+its values to memory-mapped files there and /metrics, served by any
+worker, merges them.
+"""
+
+import os
+import time
+from flask import Response, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.services.db_pool import add_pool_observer
+
+try:
+    import prometheus_client
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram
+    from prometheus_client import generate_latest, multiprocess
+except ImportError:  # optional dependency, /metrics disabled
+    prometheus_client = None
+
+_enabled = False
+
+if prometheus_client is not None:
+    HTTP_REQUESTS = Counter(
+        "waynex_http_requests_total", "HTTP requests",
+        ["blueprint", "endpoint", "method", "status"]
+    )
+    HTTP_LATENCY = Histogram(
+        "waynex_http_request_duration_seconds", "HTTP request latency",
+        ["blueprint", "endpoint"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    )
+    DB_QUERIES = Histogram(
+        "waynex_db_queries_per_request", "SQL statements per request",
+        ["blueprint"],
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+    )
+    POOL_WAIT = Histogram(
+        "waynex_db_pool_checkout_wait_seconds", "Time to check a connection out of the pool",
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+    )
+    POOL_TIMEOUTS = Counter(
+        "waynex_db_pool_checkout_timeouts_total", "Pool checkouts that timed out"
+    )
+    POOL_CHECKED_OUT = Gauge(
+        "waynex_db_pool_checked_out", "Pooled connections in use",
+        multiprocess_mode="livesum"
+    )
+    POOL_OVERFLOW = Gauge(
+        "waynex_db_pool_overflow", "Checked-out connections beyond DB_POOL_SIZE",
+        multiprocess_mode="livesum"
+    )
+    EMAIL_SEND = Histogram(
+        "waynex_email_send_duration_seconds", "Email transport call duration per batch",
+        ["transport", "outcome"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    )
+    EMAIL_DELIVERY = Histogram(
+        "waynex_email_delivery_seconds", "Time from queuing an email (e.g. an OTP) to sending it",
+        buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 300, 900)
+    )
+    EXPORT_JOBS = Histogram(
+        "waynex_export_job_duration_seconds", "Background report export duration",
+        ["kind", "status"],
+        buckets=(0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+    )
+
+
+def observe_email_send(transport, seconds, ok):
+    if _enabled:
+        EMAIL_SEND.labels(transport, "sent" if ok else "failed").observe(seconds)
+
+
+def observe_email_delivered(seconds):
+    if _enabled:
+        EMAIL_DELIVERY.observe(max(seconds, 0))
+
+
+def observe_export_job(kind, status, seconds):
+    if _enabled:
+        EXPORT_JOBS.labels(kind, status).observe(seconds)
+
+
+def _observe_pool(pool, wait, timed_out, checked_out):
+    if not _enabled:
+        return
+    if timed_out:
+        POOL_TIMEOUTS.inc()
+    elif wait is not None:
+        POOL_WAIT.observe(wait)
+    POOL_CHECKED_OUT.set(checked_out)
+    POOL_OVERFLOW.set(max(checked_out - pool.size(), 0))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if _enabled and has_app_context() and "metrics_queries" in g:
+        g.metrics_queries += 1
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_queries = 0
+
+
+def _finish_request(response):
+    start = g.pop("metrics_start", None)
+    queries = g.pop("metrics_queries", 0)
+    if start is None:
+        return response
+
+    blueprint = request.blueprint or "app"
+    endpoint = request.endpoint or "<unmatched>"
+    HTTP_REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+    HTTP_LATENCY.labels(blueprint, endpoint).observe(time.perf_counter() - start)
+    DB_QUERIES.labels(blueprint).observe(queries)
+    return response
+
+
+def metrics_view():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Record request/pool/background metrics and serve /metrics (METRICS_ENABLED)"""
+    global _enabled
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    if prometheus_client is None:
+        print("[Metrics] prometheus_client is not installed, /metrics disabled")
+        return
+
+    _enabled = True
+    add_pool_observer(_observe_pool)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
@@ -0,0 +1,115 @@
+"""
+Password Hashing Service
+========================
+Hashing policy for passwords and OTP codes.
+
+Passwords use a slow werkzeug hash whose method and cost come from
+PASSWORD_HASH_METHOD (e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000").
+Hashes made under an older policy are upgraded on the next successful login.
+
+OTP codes only live for a few minutes, so they are hashed with a salted
+HMAC-SHA256 keyed by OTP_HMAC_KEY (SECRET_KEY by default) instead of paying
+a full password-hash cost on every send and verify. Without the server key
+the 6-digit space cannot be brute-forced from a leaked hash.
+
+Slow hashes run on a bounded pool (HASHING_EXECUTOR = "thread" or
+"process", HASHING_WORKERS wide) so a login burst queues for hashing
+capacity instead of pinning every worker's CPU at once; "inline" hashes on
+the request thread.
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.perf import timed
+
+OTP_HASH_METHOD = "hmac-sha256"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    global _executor
+    kind = app.config.get("HASHING_EXECUTOR", "inline")
+    if kind == "inline":
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            workers = app.config.get("HASHING_WORKERS", 2)
+            if kind == "process":
+                _executor = ProcessPoolExecutor(max_workers=workers)
+            elif kind == "thread":
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hashing")
+            else:
+                raise ValueError(f"Unknown HASHING_EXECUTOR: {kind}")
+    return _executor
+
+
+def _run(fn, *args):
+    executor = _get_executor(current_app)
+    with timed("hash"):
+        if executor is None:
+            return fn(*args)
+        return executor.submit(fn, *args).result()
+
+
+@lru_cache(maxsize=8)
+def _stored_method(method):
+    """
+    The method prefix werkzeug writes for a configured method, with its
+    defaults filled in ("scrypt" -> "scrypt:32768:8:1", "pbkdf2:sha256" ->
+    "pbkdf2:sha256:<default iterations>"). Hashes an empty password once per
+    method and process.
+    """
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def _otp_digest(salt, otp):
+    key = current_app.config.get("OTP_HMAC_KEY") or current_app.config["SECRET_KEY"]
+    return hmac.new(key.encode(), f"{salt}${otp}".encode(), hashlib.sha256).hexdigest()
+
+
+class PasswordHashingService:
+    """Service for hashing and checking passwords and OTP codes"""
+
+    @staticmethod
+    def hash_password(password):
+        """Hash a password with the current policy"""
+        method = current_app.config.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+        return _run(generate_password_hash, password, method)
+
+    @staticmethod
+    def check_password(stored_hash, password):
+        """Check a password against a stored hash (any supported method)"""
+        if not stored_hash:
+            return False
+        return _run(check_password_hash, stored_hash, password)
+
+    @staticmethod
+    def needs_rehash(stored_hash):
+        """True if the stored hash was made with a different method or cost"""
+        method = current_app.config.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+        return stored_hash.split("$", 1)[0] != _stored_method(method)
+
+    @staticmethod
+    def hash_otp(otp):
+        """Hash an OTP code for storage: hmac-sha256$salt$digest"""
+        salt = secrets.token_hex(8)
+        return f"{OTP_HASH_METHOD}${salt}${_otp_digest(salt, otp)}"
+
+    @staticmethod
+    def verify_otp(stored_hash, otp):
+        """Verify an OTP code (also accepts werkzeug hashes from before the HMAC policy)"""
+        method, _, rest = stored_hash.partition("$")
+        if method != OTP_HASH_METHOD:
+            return PasswordHashingService.check_password(stored_hash, otp)
+
+        salt, _, digest = rest.partition("$")
+        return hmac.compare_digest(digest, _otp_digest(salt, otp))
@@ -0,0 +1,169 @@
+"""
+Performance Instrumentation
+===========================
+Times every request and the work inside it:
+
+    db    SQL statements (count and time, from cursor execute events)
+    hash  password/OTP hashing (PasswordHashingService)
+    email Resend/local transport calls (EmailOutboxService)
+    json  response serialization (app.json)
+    app   the whole request, up to the last after_request hook
+
+Each request's timings go into a fixed-size in-process ring buffer
+(PERF_BUFFER_SIZE entries) and, with PERF_SERVER_TIMING, into a
+Server-Timing response header that browser dev tools display. Timers that
+run outside a request (the outbox worker sending email) are recorded as
+tasks named "task:<span>".
+
+GET /api/admin/perf summarizes the buffer as p50/p95/p99 latency per route,
+slowest first. Each worker process keeps its own buffer.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SPANS = ("db", "hash", "email", "json")
+
+
+class PerfRecorder:
+    """Ring buffer of (key, duration_ms, spans) records"""
+
+    def __init__(self, size=5000):
+        self._records = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, key, duration_ms, spans=None):
+        with self._lock:
+            self._records.append((key, duration_ms, spans or {}))
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def report(self):
+        """Latency percentiles and average span times per key, slowest p95 first"""
+        with self._lock:
+            records = list(self._records)
+
+        grouped = {}
+        for key, duration, spans in records:
+            grouped.setdefault(key, []).append((duration, spans))
+
+        report = []
+        for key, items in grouped.items():
+            durations = sorted(duration for duration, _ in items)
+            count = len(durations)
+            entry = {
+                "route": key,
+                "count": count,
+                "p50_ms": percentile(durations, 50),
+                "p95_ms": percentile(durations, 95),
+                "p99_ms": percentile(durations, 99),
+                "max_ms": round(durations[-1], 2),
+                "avg_queries": round(sum(spans.get("queries", 0) for _, spans in items) / count, 2),
+            }
+            for name in SPANS:
+                entry[f"avg_{name}_ms"] = round(sum(spans.get(name, 0.0) for _, spans in items) / count, 2)
+            report.append(entry)
+
+        report.sort(key=lambda entry: entry["p95_ms"], reverse=True)
+        return report
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return round(sorted_values[rank - 1], 2)
+
+
+def _recorder():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("perf")
+
+
+@contextmanager
+def timed(name):
+    """
+    Time a block as span `name`: added to the current request's timings, or
+    recorded as task "task:<name>" when called outside a request.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        spans = g.get("perf_spans") if has_request_context() else None
+        if spans is not None:
+            spans[name] = spans.get(name, 0.0) + elapsed
+        else:
+            recorder = _recorder()
+            if recorder is not None:
+                recorder.record(f"task:{name}", elapsed)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_app_context() and g.get("perf_spans") is not None:
+        context._perf_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_perf_start", None)
+    if start is None:
+        return
+    spans = g.get("perf_spans")
+    if spans is not None:
+        spans["db"] = spans.get("db", 0.0) + (time.perf_counter() - start) * 1000
+        spans["queries"] = spans.get("queries", 0) + 1
+
+
+def _start_request():
+    g.perf_start = time.perf_counter()
+    g.perf_spans = {}
+
+
+def _finish_request(response):
+    start = g.pop("perf_start", None)
+    spans = g.pop("perf_spans", None)
+    if start is None:
+        return response
+
+    elapsed = (time.perf_counter() - start) * 1000
+    rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+    current_app.extensions["perf"].record(f"{request.method} {rule}", elapsed, spans)
+
+    if current_app.config.get("PERF_SERVER_TIMING"):
+        metrics = []
+        for name in SPANS:
+            if name in spans:
+                metric = f"{name};dur={spans[name]:.2f}"
+                if name == "db":
+                    metric += f';desc="{spans.get("queries", 0)} queries"'
+                metrics.append(metric)
+        metrics.append(f"app;dur={elapsed:.2f}")
+        response.headers["Server-Timing"] = ", ".join(metrics)
+
+    return response
+
+
+def init_perf(app):
+    """
+    Enable request timing (PERF_ENABLED).
+
+    Register before the other after_request hooks so the request span
+    covers them (Flask runs after_request hooks in reverse order).
+    """
+    if not app.config.get("PERF_ENABLED", True):
+        return
+
+    app.extensions["perf"] = PerfRecorder(app.config.get("PERF_BUFFER_SIZE", 5000))
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
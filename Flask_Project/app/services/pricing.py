@@ -0,0 +1,251 @@
+"""
+Pricing Engine
+==============
+Booking totals in exact fixed-point arithmetic.
+
+Amounts are converted to integer paise, every step is integer math and
+rates are exact fractions (Decimal("0.18") -> 9/50), so there is no float
+drift between a booking, its invoice and the sum of many bookings. Each
+rounded step (child fare, discount percentage, tax) rounds half up to the
+paisa, once.
+
+price_many() prices a whole batch in one pass; admin repricing uses it to
+recompute thousands of bookings and write them back with UPDATE ... FROM
+(VALUES ...) (see PricingEngine.reprice).
+
+    total    = price * adults + round(price * child_rate * children)
+    subtotal = total - discount
+    tax      = round(subtotal * tax_rate)
+    final    = subtotal + tax
+"""
+
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from types import SimpleNamespace
+from flask import current_app, has_app_context
+from sqlalchemy import Integer, Numeric, bindparam, column, update, values
+from app.extensions import db
+from app.models import Booking, Invoice
+from app.services.analytics import AnalyticsService
+
+DEFAULT_TAX_RATE = "0.18"  # GST
+DEFAULT_CHILD_RATE = "0.7"  # children pay 70% of the adult price
+REPRICE_BATCH_SIZE = 1000
+
+PriceBreakdown = namedtuple(
+    "PriceBreakdown", ["total_amount", "discount_amount", "subtotal", "tax_amount", "final_amount"]
+)
+
+
+def to_paise(amount):
+    """Convert an amount in rupees (str, int, float or Decimal) to integer paise"""
+    return int((Decimal(str(amount or 0)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise):
+    """Convert integer paise to a 2-place Decimal"""
+    return Decimal(paise).scaleb(-2)
+
+
+def parse_rate(value, name, maximum=None):
+    """
+    Validate a rate or percentage from request input.
+
+    Returns:
+        Decimal: The rate
+
+    Raises:
+        ValueError: If it is not a finite number in [0, maximum]
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str, Decimal)):
+        raise ValueError(f"{name} must be a number")
+    try:
+        rate = Decimal(str(value).strip())
+    except ArithmeticError:
+        raise ValueError(f"{name} must be a number")
+    if not rate.is_finite():
+        raise ValueError(f"{name} must be a finite number")
+    if rate < 0:
+        raise ValueError(f"{name} must not be negative")
+    if maximum is not None and rate > maximum:
+        raise ValueError(f"{name} must not be greater than {maximum}")
+    return rate
+
+
+def _fraction(rate):
+    """Exact (numerator, denominator) of a rate given as str/Decimal/int"""
+    return Decimal(str(rate)).as_integer_ratio()
+
+
+def _apply_rate(paise, numerator, denominator):
+    """round(paise * numerator / denominator), half away from zero"""
+    value = abs(paise) * numerator
+    rounded = (2 * value + denominator) // (2 * denominator)
+    return rounded if paise >= 0 else -rounded
+
+
+def _config_rate(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+class PricingEngine:
+    """Service for computing and re-applying booking prices"""
+
+    @staticmethod
+    def price_many(items, tax_rate=None, child_rate=None, discount_percent=None):
+        """
+        Price a batch of bookings.
+
+        Args:
+            items: Iterable of (price_per_person, num_adults, num_children, discount_amount)
+            tax_rate: Defaults to GST_RATE from config
+            child_rate: Defaults to CHILD_PRICE_RATE from config
+            discount_percent: If given (e.g. "10"), replaces each discount
+                              with this percentage of the total
+
+        Returns:
+            list: PriceBreakdown of 2-place Decimals per item, in order
+        """
+        tax_num, tax_den = _fraction(tax_rate if tax_rate is not None
+                                     else _config_rate("GST_RATE", DEFAULT_TAX_RATE))
+        child_num, child_den = _fraction(child_rate if child_rate is not None
+                                         else _config_rate("CHILD_PRICE_RATE", DEFAULT_CHILD_RATE))
+        if discount_percent is not None:
+            pct_num, pct_den = _fraction(Decimal(str(discount_percent)) / 100)
+
+        results = []
+        for price, num_adults, num_children, discount in items:
+            price = to_paise(price)
+            total = price * num_adults + _apply_rate(price * (num_children or 0), child_num, child_den)
+            if discount_percent is not None:
+                discount = _apply_rate(total, pct_num, pct_den)
+            else:
+                discount = to_paise(discount)
+            subtotal = total - discount
+            tax = _apply_rate(subtotal, tax_num, tax_den)
+            results.append(PriceBreakdown(
+                from_paise(total), from_paise(discount), from_paise(subtotal),
+                from_paise(tax), from_paise(subtotal + tax)
+            ))
+        return results
+
+    @staticmethod
+    def price(price_per_person, num_adults, num_children=0, discount_amount=0, **rates):
+        """Price a single booking (see price_many)"""
+        return PricingEngine.price_many(
+            [(price_per_person, num_adults, num_children, discount_amount)], **rates
+        )[0]
+
+    @staticmethod
+    def reprice(booking_query, tax_rate=None, child_rate=None, discount_percent=None,
+                dry_run=False, batch_size=REPRICE_BATCH_SIZE):
+        """
+        Recompute stored totals for the bookings selected by booking_query and
+        write the changed ones back, with one UPDATE ... FROM (VALUES ...) for
+        bookings and one for invoices per batch. Runs in the caller's
+        transaction; the caller commits.
+
+        Returns:
+            dict: {"scanned": int, "changed": int, "final_amount_delta": Decimal}
+        """
+        rows = booking_query.with_entities(
+            Booking.id, Booking.price_per_person, Booking.num_adults, Booking.num_children,
+            Booking.discount_amount, Booking.total_amount, Booking.tax_amount,
+            Booking.final_amount, Booking.booking_date, Booking.status, Booking.package_type
+        ).order_by(None).order_by(Booking.id)
+
+        stats = {"scanned": 0, "changed": 0, "final_amount_delta": Decimal("0.00")}
+        last_id = 0
+
+        # Walk the selection in id order, one batch per round trip, so each
+        # batch's UPDATEs run with no read cursor open on the connection
+        while True:
+            batch = rows.filter(Booking.id > last_id).limit(batch_size).all()
+            if not batch:
+                return stats
+            last_id = batch[-1].id
+
+            prices = PricingEngine.price_many(
+                [(r.price_per_person, r.num_adults, r.num_children, r.discount_amount) for r in batch],
+                tax_rate=tax_rate, child_rate=child_rate, discount_percent=discount_percent
+            )
+            changed = [
+                (r, p) for r, p in zip(batch, prices)
+                if (p.total_amount, p.discount_amount, p.tax_amount, p.final_amount)
+                != (r.total_amount, r.discount_amount, r.tax_amount, r.final_amount)
+            ]
+            stats["scanned"] += len(batch)
+            stats["changed"] += len(changed)
+            stats["final_amount_delta"] += sum((p.final_amount - r.final_amount for r, p in changed), Decimal("0.00"))
+            if changed and not dry_run:
+                PricingEngine._apply(changed)
+                AnalyticsService.record_bulk_changes(
+                    inserted=[_rollup_values(r, p.final_amount) for r, p in changed],
+                    deleted=[_rollup_values(r, r.final_amount) for r, p in changed]
+                )
+
+    @staticmethod
+    def _apply(changed):
+        money = Numeric(10, 2)
+        names = ("id", "total_amount", "discount_amount", "subtotal", "tax_amount", "final_amount")
+        data = [
+            (r.id, p.total_amount, p.discount_amount, p.subtotal, p.tax_amount, p.final_amount)
+            for r, p in changed
+        ]
+
+        if db.session.get_bind().dialect.name == "postgresql":
+            new_prices = values(
+                column("id", Integer), *(column(name, money) for name in names[1:]),
+                name="new_prices"
+            ).data(data)
+            params = None
+        else:
+            # VALUES with column aliases is PostgreSQL syntax; elsewhere run
+            # the same statements as one executemany over bound parameters
+            new_prices = SimpleNamespace(c=SimpleNamespace(**{
+                name: bindparam(f"new_{name}", type_=Integer if name == "id" else money)
+                for name in names
+            }))
+            params = [{f"new_{name}": value for name, value in zip(names, row)} for row in data]
+
+        bookings = Booking.__table__
+        invoices = Invoice.__table__
+        now = datetime.utcnow()
+
+        db.session.execute(
+            update(bookings)
+            .where(bookings.c.id == new_prices.c.id)
+            .values(
+                total_amount=new_prices.c.total_amount,
+                discount_amount=new_prices.c.discount_amount,
+                tax_amount=new_prices.c.tax_amount,
+                final_amount=new_prices.c.final_amount,
+                updated_at=now
+            ),
+            params
+        )
+        db.session.execute(
+            update(invoices)
+            .where(invoices.c.booking_id == new_prices.c.id)
+            .values(
+                subtotal=new_prices.c.subtotal,
+                tax_amount=new_prices.c.tax_amount,
+                discount_amount=new_prices.c.discount_amount,
+                total_amount=new_prices.c.final_amount,
+                balance_due=new_prices.c.final_amount - invoices.c.paid_amount,
+                updated_at=now
+            ),
+            params
+        )
+
+
+def _rollup_values(row, final_amount):
+    return {
+        "booking_date": row.booking_date,
+        "status": row.status,
+        "package_type": row.package_type,
+        "final_amount": final_amount
+    }
@@ -0,0 +1,155 @@
+"""
+Query Counter
+=============
+Counts SQL statements per request in debug/testing mode so N+1 regressions
+show up during development instead of in production.
+
+Views declare an upper bound with @query_budget(n). When counting is on,
+every response carries an X-Query-Count header; going over budget raises
+QueryBudgetExceeded under app.testing (failing the test) or when
+QUERY_BUDGET_STRICT is set, and prints a warning otherwise.
+
+count_queries() also measures the bytes of result rows fetched inside the
+block (the size of each value as text, roughly what the database sends),
+which check_query_budgets.py compares against query_budgets.json.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Active count_queries() counters (outside of requests, e.g. in tests)
+_counters = []
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view runs more SQL statements than its budget"""
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.bytes_fetched = 0
+        self.statements = []
+
+    def record(self, statement):
+        self.count += 1
+        self.statements.append(statement)
+
+
+def _value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return len(str(value).encode("utf-8"))
+
+
+class _MeasuringCursor:
+    """DBAPI cursor proxy adding the size of fetched rows to counters"""
+
+    def __init__(self, cursor, counters):
+        self._cursor = cursor
+        self._counters = counters
+
+    def _measure(self, rows):
+        size = sum(_value_size(value) for row in rows for value in row)
+        for counter in self._counters:
+            counter.bytes_fetched += size
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._measure((row,))
+        return row
+
+    def fetchmany(self, *args):
+        return self._measure(self._cursor.fetchmany(*args))
+
+    def fetchall(self):
+        return self._measure(self._cursor.fetchall())
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._measure((row,))
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def query_budget(max_queries):
+    """Declare the maximum number of SQL statements a view may run"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return view(*args, **kwargs)
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def count_queries():
+    """Count statements and fetched bytes inside the block: `with count_queries() as c:`"""
+    counter = QueryCounter()
+    _counters.append(counter)
+    try:
+        yield counter
+    finally:
+        _counters.remove(counter)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _counters:
+        counter.record(statement)
+    if has_app_context():
+        counter = g.get("query_counter")
+        if counter is not None:
+            counter.record(statement)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _measure_results(conn, cursor, statement, parameters, context, executemany):
+    # Results are read through context.cursor after this event, so swapping
+    # in a proxy sees every row the statement returns
+    if _counters and context is not None and cursor.description is not None:
+        context.cursor = _MeasuringCursor(cursor, list(_counters))
+
+
+def _start_counting():
+    g.query_counter = QueryCounter()
+
+
+def _check_budget(response):
+    counter = g.pop("query_counter", None)
+    if counter is None:
+        return response
+
+    response.headers["X-Query-Count"] = str(counter.count)
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, "query_budget", None)
+    if budget is not None and counter.count > budget:
+        message = (
+            f"{request.endpoint} ran {counter.count} queries "
+            f"(budget {budget}):\n" + "\n".join(counter.statements)
+        )
+        if current_app.testing or current_app.config.get("QUERY_BUDGET_STRICT"):
+            raise QueryBudgetExceeded(message)
+        print(f"[QueryBudget] {message}")
+
+    return response
+
+
+def init_query_counter(app):
+    """Enable per-request counting in debug/testing (or QUERY_COUNTER_ENABLED)"""
+    if not (app.debug or app.testing or app.config.get("QUERY_COUNTER_ENABLED")):
+        return
+
+    app.before_request(_start_counting)
+    app.after_request(_check_budget)
@@ -0,0 +1,196 @@
+"""
+Search Service
+==============
+Ranked, typo-tolerant search for the API.
+
+- SearchIndex: pure-Python inverted index for small in-memory catalogs
+  (tours). Supports prefix matching and single-edit typo tolerance.
+- search_query(): pg_trgm backed search for database tables (users,
+  bookings). Rows match `column ILIKE '%term%'` or `column %> term`
+  (the term is word-similar to part of the column); both can use the
+  trigram GIN indexes created by ensure_search_indexes(). Results are
+  ranked by word_similarity(term, column).
+"""
+
+import re
+from bisect import bisect_left
+from flask import current_app
+from sqlalchemy import func, or_, text
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Score multipliers per match kind
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.7
+FUZZY_SCORE = 0.4
+
+# Trigram GIN indexes backing search_query(); see ensure_search_indexes()
+SEARCH_INDEXES = (
+    ("ix_users_email_trgm", "users", "email"),
+    ("ix_users_first_name_trgm", "users", "first_name"),
+    ("ix_users_last_name_trgm", "users", "last_name"),
+    ("ix_bookings_booking_id_str_trgm", "bookings", "booking_id_str"),
+    ("ix_bookings_user_email_trgm", "bookings", "user_email"),
+    ("ix_bookings_destination_trgm", "bookings", "destination"),
+)
+
+
+def tokenize(value):
+    """Split text into lowercase alphanumeric tokens"""
+    if not value:
+        return []
+    return _TOKEN_RE.findall(str(value).lower())
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by at most one insert, delete, substitute or swap"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        # Adjacent transposition
+        return (i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i]
+                and a[i + 2:] == b[i + 2:])
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """
+    Inverted index over a fixed set of documents.
+
+    Args:
+        documents: Iterable of (key, {field: text}) pairs
+        weights: {field: weight}; fields not listed are not indexed
+    """
+
+    MIN_FUZZY_LENGTH = 4
+
+    def __init__(self, documents, weights):
+        self._postings = {}   # token -> {key: weight}
+        self._order = {}      # key -> insertion position (tie-breaker)
+
+        for position, (key, fields) in enumerate(documents):
+            self._order[key] = position
+            for field, weight in weights.items():
+                for token in tokenize(fields.get(field)):
+                    postings = self._postings.setdefault(token, {})
+                    postings[key] = max(postings.get(key, 0), weight)
+
+        self._vocabulary = sorted(self._postings)
+        self._trigram_index = {}
+        for token in self._vocabulary:
+            for gram in _trigrams(token):
+                self._trigram_index.setdefault(gram, set()).add(token)
+
+    def __len__(self):
+        return len(self._order)
+
+    def _expand(self, term):
+        """Map a query token to {index token: score multiplier}"""
+        matches = {}
+
+        if term in self._postings:
+            matches[term] = EXACT_SCORE
+
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            matches.setdefault(token, PREFIX_SCORE)
+
+        if not matches and len(term) >= self.MIN_FUZZY_LENGTH:
+            candidates = set()
+            for gram in _trigrams(term):
+                candidates |= self._trigram_index.get(gram, set())
+            for token in candidates:
+                if _within_one_edit(term, token):
+                    matches[token] = FUZZY_SCORE
+
+        return matches
+
+    def search(self, query):
+        """
+        Search the index.
+
+        Every query token must match (exactly, as a prefix or within one
+        edit). Results are ordered by score, then by insertion order.
+
+        Returns:
+            list: Matching document keys, best first
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for term in dict.fromkeys(terms):
+            term_scores = {}
+            for token, multiplier in self._expand(term).items():
+                for key, weight in self._postings[token].items():
+                    score = weight * multiplier
+                    if score > term_scores.get(key, 0):
+                        term_scores[key] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    key: score + term_scores[key]
+                    for key, score in scores.items() if key in term_scores
+                }
+            if not scores:
+                return []
+
+        return sorted(scores, key=lambda key: (-scores[key], self._order[key]))
+
+
+def search_query(query, term, columns, order_by=()):
+    """
+    Apply a ranked search over `columns` to a SQLAlchemy query.
+
+    With SEARCH_BACKEND = "trigram" (PostgreSQL + pg_trgm) rows match on a
+    substring or on trigram word similarity (typo tolerance) and are ranked
+    by the best similarity across columns. With "ilike" this falls back to
+    plain substring matching with `order_by` ordering.
+    """
+    pattern = f"%{term}%"
+
+    if current_app.config.get("SEARCH_BACKEND") != "trigram":
+        query = query.filter(or_(*(column.ilike(pattern) for column in columns)))
+        return query.order_by(*order_by)
+
+    query = query.filter(or_(
+        *(column.ilike(pattern) for column in columns),
+        *(column.op("%>")(term) for column in columns)
+    ))
+    rank = func.greatest(*(
+        func.coalesce(func.word_similarity(term, column), 0)
+        for column in columns
+    ))
+    return query.order_by(rank.desc(), *order_by)
+
+
+def ensure_search_indexes(db):
+    """Create the pg_trgm extension and trigram GIN indexes (idempotent)"""
+    with db.engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for name, table, column in SEARCH_INDEXES:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {name} "
+                f"ON {table} USING gin ({column} gin_trgm_ops)"
+            ))
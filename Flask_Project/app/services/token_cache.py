@@ -0,0 +1,184 @@
+"""
+Remember Token Cache
+====================
+In-process cache of verified remember-me tokens, so the verify-token call
+every remembered user makes when opening the app is answered from memory:
+no JWT decode and no users query.
+
+An entry lives until the token expires or REMEMBER_TOKEN_CACHE_TTL seconds
+pass, whichever comes first (the default TTL is the token lifetime), and
+the cache keeps at most REMEMBER_TOKEN_CACHE_SIZE entries (least recently
+used are evicted).
+
+Revocation goes through a revocation set shared by all worker processes:
+one small file per user in REMEMBER_TOKEN_REVOCATION_DIR, rewritten with a
+new random marker after every committed change to that user (logout, a
+new login replacing the token, password change, admin demotion, profile
+edits, deletion). Each entry remembers the marker seen before the user was
+loaded, and a hit whose marker has changed is dropped and verified against
+the database again, so a revocation committed in any worker takes effect
+in every worker on the next request. The directory must be shared by all
+app processes (like REPORT_EXPORT_FOLDER); markers older than the TTL can
+no longer match a live entry and are pruned.
+
+Changes made with bulk UPDATE/DELETE statements bypass the session hooks
+and must call mark_users_changed() for the affected users.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Caches whose entries are dropped when a user changes
+_instances = []
+
+PRUNE_INTERVAL = 3600  # seconds between marker prunes per process
+
+
+def _token_key(token):
+    return hashlib.sha256(token.encode()).digest()
+
+
+class RememberTokenCache:
+    """LRU cache of token -> user dict with per-entry expiry and revocation markers"""
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.revocation_dir = None
+        self._entries = OrderedDict()  # key -> (user_id, user_dict, expires_at, marker)
+        self._lock = threading.Lock()
+        self._last_prune = 0
+        _instances.append(self)
+
+    def init_app(self, app):
+        self.max_size = app.config.get("REMEMBER_TOKEN_CACHE_SIZE", self.max_size)
+        self.ttl = app.config.get("REMEMBER_TOKEN_CACHE_TTL", self.ttl)
+        self.revocation_dir = app.config.get("REMEMBER_TOKEN_REVOCATION_DIR")
+        if self.revocation_dir:
+            os.makedirs(self.revocation_dir, exist_ok=True)
+        app.extensions["remember_token_cache"] = self
+
+    # ---------- Revocation markers ----------
+
+    def _marker_path(self, user_id):
+        return os.path.join(self.revocation_dir, str(int(user_id)))
+
+    def marker(self, user_id):
+        """The user's current revocation marker, or None if the user has not changed recently"""
+        if not self.revocation_dir:
+            return None
+        try:
+            with open(self._marker_path(user_id), "r", encoding="ascii") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def mark_changed(self, user_ids):
+        """Publish new markers for users, invalidating their entries in every process"""
+        self.revoke_user(*user_ids)
+        if not self.revocation_dir:
+            return
+        for user_id in user_ids:
+            path = self._marker_path(user_id)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="ascii") as f:
+                f.write(uuid.uuid4().hex)
+            os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        for entry in os.scandir(self.revocation_dir):
+            try:
+                if entry.stat().st_mtime < now - self.ttl:
+                    os.remove(entry.path)
+            except FileNotFoundError:  # pruned by another process
+                pass
+
+    # ---------- Entries ----------
+
+    def get(self, token):
+        """The cached user dict for a verified token, or None"""
+        key = _token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        user_id, user_dict, _, marker = entry
+        if self.marker(user_id) != marker:
+            self.revoke_user(user_id)
+            return None
+        return user_dict
+
+    def put(self, token, user_id, user_dict, token_expires_at, marker):
+        """
+        Cache a token verified against the database.
+
+        Args:
+            token_expires_at: Unix timestamp after which the token is invalid
+            marker: The user's marker(), read before the user was loaded
+        """
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        expires_at = min(token_expires_at, time.time() + self.ttl)
+        key = _token_key(token)
+        with self._lock:
+            self._entries[key] = (user_id, user_dict, expires_at, marker)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def revoke_user(self, *user_ids):
+        """Drop every cached token belonging to the given users (this process only)"""
+        user_ids = set(user_ids)
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[0] in user_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def mark_users_changed(*user_ids):
+    """Revoke cached tokens of users in every process (call after commit)"""
+    for cache in _instances:
+        cache.mark_changed(set(user_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    from app.models import User
+
+    # New users have no cached tokens yet
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _revoke_changed_users(session):
+    changed = session.info.pop("changed_user_ids", None)
+    if changed:
+        mark_users_changed(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_user_ids", None)
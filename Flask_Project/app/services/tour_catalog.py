@@ -0,0 +1,287 @@
+"""
+Tour Catalog Service
+====================
+Keeps the tour catalog in process memory so listing, filtering and lookup
+requests never touch the database.
+
+The catalog is loaded once from data/waynex_tours_complete.json when the app
+starts and can be rebuilt at runtime with reload() (e.g. after a new scrape
+has been imported).
+"""
+
+import hashlib
+import json
+import threading
+from collections import namedtuple
+from .search import SearchIndex
+
+
+TOUR_FIELDS = (
+    "code", "name", "tour_type", "category", "duration", "price",
+    "destinations", "card_image", "url", "slider_images", "highlights",
+    "itinerary", "hotels", "inclusions", "exclusions",
+    "why_tour_with_waynex", "sample_departures",
+)
+
+# Fields needed to render a tour card in list views
+CARD_FIELDS = (
+    "code", "name", "tour_type", "category", "duration", "price",
+    "destinations", "card_image",
+)
+
+TOUR_TYPES = ("domestic", "international")
+
+# Relevance weight of each field in tour search
+SEARCH_WEIGHTS = {"code": 3, "name": 3, "destinations": 2, "category": 1}
+
+# Immutable view of the catalog; swapped in one assignment on reload so
+# concurrent readers always see a consistent set of indexes.
+_Snapshot = namedtuple("_Snapshot", [
+    "by_code",       # code -> tour
+    "cards",         # code -> card projection of the tour
+    "by_price",      # all tours, price ascending
+    "by_type",       # tour_type -> [tour], price ascending
+    "by_category",   # (tour_type, category) -> [tour], price ascending
+    "categories",    # tour_type -> [category] in source order
+    "search_index",  # SearchIndex over name, destinations, code, category
+    "structured",    # (body bytes, etag) for /api/tours/structured
+])
+
+
+def _price_key(tour):
+    """Sort key placing tours without a price last"""
+    price = tour["price"]
+    return (price is None, price or 0, tour["code"])
+
+
+def _parse_price(value):
+    """Coerce a scraped price (int, '19990' or '₹19,990') to an int"""
+    if value is None or isinstance(value, int):
+        return value
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    return int(digits) if digits else None
+
+
+def _build_structured(categories, by_category):
+    """
+    Pre-serialize the grouped catalog for /api/tours/structured.
+
+    Returns:
+        tuple: (UTF-8 JSON body, strong ETag)
+    """
+    data = {
+        tour_type: {
+            category: by_category[(tour_type, category)]
+            for category in type_categories
+        }
+        for tour_type, type_categories in categories.items()
+    }
+    domestic = data.get("domestic", {})
+    international = data.get("international", {})
+
+    body = json.dumps({
+        "data": {
+            "domestic": domestic,
+            "international": international
+        },
+        "metadata": {
+            "domestic_states": list(domestic.keys()),
+            "international_regions": list(international.keys()),
+            "total_tours": sum(len(tours) for tours in domestic.values()) +
+                           sum(len(tours) for tours in international.values())
+        }
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+
+_EMPTY = _Snapshot({}, {}, [], {}, {}, {}, SearchIndex([], SEARCH_WEIGHTS),
+                   _build_structured({}, {}))
+
+
+def _build_tour(raw, tour_type, category):
+    """Normalize a scraped tour record into the API representation"""
+    tour = {field: raw.get(field) for field in TOUR_FIELDS}
+    tour["code"] = raw["code"].upper()
+    tour["tour_type"] = tour_type
+    tour["category"] = category
+    tour["price"] = _parse_price(raw.get("price"))
+    for field in ("slider_images", "highlights", "itinerary", "hotels",
+                  "inclusions", "exclusions", "why_tour_with_waynex",
+                  "sample_departures"):
+        if tour[field] is None:
+            tour[field] = []
+    return tour
+
+
+class TourCatalog:
+    """In-memory, indexed tour catalog"""
+
+    def __init__(self, app=None):
+        self.path = None
+        self.version = 0
+        self._snapshot = _EMPTY
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Load the catalog from the configured JSON file"""
+        self.path = app.config.get("TOUR_CATALOG_PATH")
+        app.extensions["tour_catalog"] = self
+        self.reload()
+
+    # ---------- Loading ----------
+
+    def reload(self, path=None):
+        """
+        Rebuild the catalog from its JSON source.
+
+        Returns:
+            int: Number of tours loaded
+        """
+        path = path or self.path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[TourCatalog] Failed to load {path}: {str(e)}")
+            return len(self._snapshot.by_code)
+
+        return self.load_data(data.get("data", {}))
+
+    def load_data(self, tours_data):
+        """
+        Build indexes from {tour_type: {category: [raw tour, ...]}}.
+
+        Records without a code are partial duplicates left by the scraper
+        and are skipped; the first record seen for a code wins.
+        """
+        by_code = {}
+        categories = {tour_type: [] for tour_type in TOUR_TYPES}
+        grouped = {}
+
+        for tour_type, groups in tours_data.items():
+            type_categories = categories.setdefault(tour_type, [])
+            for category, tours in groups.items():
+                for raw in tours:
+                    if not raw.get("code"):
+                        continue
+                    tour = _build_tour(raw, tour_type, category)
+                    if tour["code"] in by_code:
+                        continue
+                    by_code[tour["code"]] = tour
+                    if category not in type_categories:
+                        type_categories.append(category)
+                    grouped.setdefault((tour_type, category), []).append(tour)
+
+        by_price = sorted(by_code.values(), key=_price_key)
+        by_type = {tour_type: [] for tour_type in categories}
+        for tour in by_price:
+            by_type[tour["tour_type"]].append(tour)
+        by_category = {
+            key: sorted(tours, key=_price_key) for key, tours in grouped.items()
+        }
+        search_index = SearchIndex(
+            ((tour["code"], tour) for tour in by_price), SEARCH_WEIGHTS
+        )
+
+        cards = {
+            code: {field: tour[field] for field in CARD_FIELDS}
+            for code, tour in by_code.items()
+        }
+        structured = _build_structured(categories, by_category)
+
+        snapshot = _Snapshot(by_code, cards, by_price, by_type, by_category,
+                             categories, search_index, structured)
+        with self._lock:
+            self._snapshot = snapshot
+            self.version += 1
+
+        print(f"[TourCatalog] Loaded {len(by_code)} tours (version {self.version})")
+        return len(by_code)
+
+    # ---------- Queries ----------
+
+    def __len__(self):
+        return len(self._snapshot.by_code)
+
+    def get(self, code):
+        """Get a tour by code (case-insensitive)"""
+        if not code:
+            return None
+        return self._snapshot.by_code.get(code.upper())
+
+    def get_categories(self, tour_type):
+        """Get category names for a tour type in source order"""
+        return list(self._snapshot.categories.get(tour_type, []))
+
+    def by_category(self, tour_type, category):
+        """Get tours for a category, price ascending"""
+        return self._snapshot.by_category.get((tour_type, category), [])
+
+    @property
+    def etag(self):
+        """Content hash of the loaded catalog (same in every worker for the same data)"""
+        return self._snapshot.structured[1]
+
+    def structured(self):
+        """
+        Get the pre-serialized structured catalog.
+
+        Returns:
+            tuple: (UTF-8 JSON body, ETag); rebuilt on every reload
+        """
+        return self._snapshot.structured
+
+    def filter(self, tour_type=None, category=None, search=None):
+        """
+        Filter tours, price ascending.
+
+        With a search term, tours are ranked by relevance (prefix and
+        typo-tolerant match on code, name, destinations and category) and
+        ties keep price order.
+        """
+        snapshot = self._snapshot
+
+        if tour_type and category:
+            tours = snapshot.by_category.get((tour_type, category), [])
+        elif tour_type:
+            tours = snapshot.by_type.get(tour_type, [])
+        elif category:
+            tours = [t for t in snapshot.by_price if t["category"] == category]
+        else:
+            tours = snapshot.by_price
+
+        if search:
+            allowed = None if tours is snapshot.by_price else {t["code"] for t in tours}
+            tours = [
+                snapshot.by_code[code] for code in snapshot.search_index.search(search)
+                if allowed is None or code in allowed
+            ]
+
+        return tours
+
+    def project(self, tours, view=None, fields=None):
+        """
+        Project tours for a list response.
+
+        Args:
+            view: 'card' for the precomputed CARD_FIELDS projection
+            fields: Comma-separated field names (takes precedence over view)
+
+        Returns:
+            list: Tours restricted to the requested fields
+        """
+        if fields:
+            names = ["code"] + [
+                name for name in dict.fromkeys(fields.split(","))
+                if name in TOUR_FIELDS and name != "code"
+            ]
+            return [{name: tour[name] for name in names} for tour in tours]
+
+        if view == "card":
+            cards = self._snapshot.cards
+            return [cards[tour["code"]] for tour in tours]
+
+        return tours
@@ -1,10 +1,19 @@
-from flask import Blueprint, request, jsonify
-from app.models import Tour
-from app.extensions import db
+from flask import Blueprint, Response, request, jsonify
+from app.extensions import tour_catalog
+from app.pagination import keyset_slice, InvalidCursor, InvalidLimit
+from app.services.compression import cache_variants
+from app.services.http_cache import http_cached
 
 tours_bp = Blueprint('tours', __name__, url_prefix="/api/tours")
 
+
+def _catalog_version(*args, **kwargs):
+    """Every tour response is derived from the loaded catalog alone"""
+    return tour_catalog.etag, None
+
+
 @tours_bp.route("/", methods=["GET"])
+@http_cached(validator=_catalog_version)
 def get_all_tours():
     """Get all active tours with optional filters"""
     tour_type = request.args.get("type")  # 'domestic' or 'international'
@@ -12,74 +21,74 @@ def get_all_tours():
     search = request.args.get("search", "")
     limit = request.args.get("limit", type=int, default=100)
     offset = request.args.get("offset", type=int, default=0)
-
-    query = Tour.query.filter_by(is_active=True)
-
-    # Apply filters
-    if tour_type:
-        query = query.filter_by(tour_type=tour_type)
-    if category:
-        query = query.filter_by(category=category)
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (Tour.name.ilike(search_filter)) |
-            (Tour.destinations.ilike(search_filter)) |
-            (Tour.code.ilike(search_filter))
-        )
-
-    # Order by price (ascending)
-    query = query.order_by(Tour.price.asc())
-
-    total = query.count()
-    tours = query.limit(limit).offset(offset).all()
+    cursor = request.args.get("cursor")  # keyset pagination on (price, code)
+    view = request.args.get("view")  # 'card' for the lightweight projection
+    fields = request.args.get("fields")  # e.g. 'code,name,price'
+
+    # Served from the in-memory catalog, already ordered by price (ascending)
+    tours = tour_catalog.filter(tour_type=tour_type, category=category, search=search)
+
+    if cursor is not None:
+        try:
+            page, next_cursor = keyset_slice(
+                tours, lambda tour: (tour["price"], tour["code"]), cursor, limit,
+                ordered=not search  # search results are ranked by relevance
+            )
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        except InvalidLimit as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "tours": tour_catalog.project(page, view, fields),
+            "next_cursor": next_cursor,
+            "total": len(tours),
+            "limit": limit
+        }), 200
 
     return jsonify({
-        "tours": [tour.to_dict() for tour in tours],
-        "total": total,
+        "tours": tour_catalog.project(tours[offset:offset + limit], view, fields),
+        "total": len(tours),
         "limit": limit,
         "offset": offset
     }), 200
 
 
 @tours_bp.route("/<tour_code>", methods=["GET"])
+@http_cached(validator=_catalog_version)
 def get_tour_by_code(tour_code):
     """Get a specific tour by code"""
-    tour = Tour.query.filter_by(code=tour_code.upper(), is_active=True).first()
+    tour = tour_catalog.get(tour_code)
 
     if not tour:
         return jsonify({"error": "Tour not found"}), 404
 
-    return jsonify({"tour": tour.to_dict()}), 200
+    return jsonify({"tour": tour}), 200
 
 
 @tours_bp.route("/categories/<tour_type>", methods=["GET"])
+@http_cached(validator=_catalog_version)
 def get_tour_categories(tour_type):
     """Get all categories for a tour type"""
-    categories = db.session.query(Tour.category).filter_by(
-        tour_type=tour_type,
-        is_active=True
-    ).distinct().all()
-
     return jsonify({
         "type": tour_type,
-        "categories": [cat[0] for cat in categories]
+        "categories": tour_catalog.get_categories(tour_type)
     }), 200
 
 
 @tours_bp.route("/by-category/<tour_type>/<category>", methods=["GET"])
+@http_cached(validator=_catalog_version)
 def get_tours_by_category(tour_type, category):
     """Get all tours for a specific category"""
-    tours = Tour.query.filter_by(
-        tour_type=tour_type,
-        category=category,
-        is_active=True
-    ).order_by(Tour.price.asc()).all()
+    view = request.args.get("view")  # 'card' for the lightweight projection
+    fields = request.args.get("fields")  # e.g. 'code,name,price'
+
+    tours = tour_catalog.by_category(tour_type, category)
 
     return jsonify({
         "type": tour_type,
         "category": category,
-        "tours": [tour.to_dict() for tour in tours],
+        "tours": tour_catalog.project(tours, view, fields),
         "total": len(tours)
     }), 200
 
@@ -87,46 +96,8 @@ def get_tours_by_category(tour_type, category):
 @tours_bp.route("/structured", methods=["GET"])
 def get_structured_tours():
     """Get tours in the same structure as JSON (for compatibility)"""
-    domestic_tours = {}
-    international_tours = {}
-
-    # Get all domestic tours
-    domestic_categories = db.session.query(Tour.category).filter_by(
-        tour_type='domestic',
-        is_active=True
-    ).distinct().all()
-
-    for (category,) in domestic_categories:
-        tours = Tour.query.filter_by(
-            tour_type='domestic',
-            category=category,
-            is_active=True
-        ).all()
-        domestic_tours[category] = [tour.to_dict() for tour in tours]
-
-    # Get all international tours
-    international_categories = db.session.query(Tour.category).filter_by(
-        tour_type='international',
-        is_active=True
-    ).distinct().all()
-
-    for (category,) in international_categories:
-        tours = Tour.query.filter_by(
-            tour_type='international',
-            category=category,
-            is_active=True
-        ).all()
-        international_tours[category] = [tour.to_dict() for tour in tours]
+    body, etag = tour_catalog.structured()
 
-    return jsonify({
-        "data": {
-            "domestic": domestic_tours,
-            "international": international_tours
-        },
-        "metadata": {
-            "domestic_states": list(domestic_tours.keys()),
-            "international_regions": list(international_tours.keys()),
-            "total_tours": sum(len(tours) for tours in domestic_tours.values()) +
-                           sum(len(tours) for tours in international_tours.values())
-        }
-    }), 200
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    return cache_variants(response.make_conditional(request))
@@ -1,12 +1,38 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash
-from app.models import User
+from app.models import User, Booking
 from app.extensions import db
 from app.schemas import UserUpdateSchema
+from app.services.query_counter import query_budget
+from app.services.http_cache import http_cached
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 users_bp = Blueprint('users', __name__, url_prefix="/api/users")
 
+
+def _user_version(user_id):
+    """The profile changes only with users.updated_at"""
+    updated_at = db.session.query(User.updated_at).filter(User.id == user_id).scalar()
+    if updated_at is None:
+        return None
+    return updated_at.isoformat(), updated_at
+
+
+def _user_bookings_version(user_id):
+    """Any booking insert, update or delete changes the count or the latest updated_at"""
+    row = db.session.query(func.count(Booking.id), func.max(Booking.updated_at)) \
+        .select_from(User).outerjoin(Booking, Booking.user_id == User.id) \
+        .filter(User.id == user_id).group_by(User.id).first()
+    if row is None:
+        return None
+    count, last_updated = row
+    return f"{count}|{last_updated.isoformat() if last_updated else ''}", last_updated
+
+
 @users_bp.route("/<int:user_id>", methods=["GET"])
+@query_budget(2)
+@http_cached(validator=_user_version)
 def get_user(user_id):
     """Get user profile by ID"""
     user = User.query.get(user_id)
@@ -60,14 +86,28 @@ def update_user(user_id):
 
 
 @users_bp.route("/<int:user_id>/bookings", methods=["GET"])
+@query_budget(3)
+@http_cached(validator=_user_bookings_version)
 def get_user_bookings(user_id):
     """Get all bookings for a specific user"""
-    user = User.query.get(user_id)
+    view = request.args.get("view")  # 'card' for the lightweight projection
+
+    if view == "card":
+        user = User.query.get(user_id)
+    else:
+        # Load the user's bookings with one extra IN query
+        user = User.query.options(selectinload(User.bookings)).get(user_id)
 
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    bookings = [booking.to_dict() for booking in user.bookings]
+    if view == "card":
+        bookings = [
+            booking.to_card_dict() for booking in
+            Booking.query.options(Booking.card_load_options()).filter_by(user_id=user_id)
+        ]
+    else:
+        bookings = [booking.to_dict() for booking in user.bookings]
 
     return jsonify({
         "user_id": user_id,
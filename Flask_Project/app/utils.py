@@ -1,47 +1,37 @@
-import random
-import string
-from datetime import datetime
+from app.services.id_generator import IdGenerator
+from app.services.pricing import PricingEngine
 
 def generate_booking_id():
-    """Generate a unique booking ID in format: BK-YYYYMMDD-XXXX"""
-    date_str = datetime.now().strftime("%Y%m%d")
-    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"BK-{date_str}-{random_str}"
+    """Generate a unique booking ID in format: BK-YYYYMMDD-XXXXXXXX"""
+    return IdGenerator.booking_ids()[0]
 
 def generate_invoice_number():
-    """Generate a unique invoice number in format: INV-YYYYMMDD-XXXX"""
-    date_str = datetime.now().strftime("%Y%m%d")
-    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"INV-{date_str}-{random_str}"
+    """Generate a unique invoice number in format: INV-YYYYMMDD-XXXXXXXX"""
+    return IdGenerator.invoice_numbers()[0]
 
-def calculate_tax(amount, tax_rate=0.18):
-    """Calculate tax amount (default 18% GST)"""
-    return round(float(amount) * tax_rate, 2)
+def calculate_tax(amount, tax_rate=None):
+    """Calculate tax amount (default GST_RATE, 18%) as a 2-place Decimal"""
+    return PricingEngine.price(amount, 1, tax_rate=tax_rate).tax_amount
 
-def calculate_booking_totals(price_per_person, num_adults, num_children=0, discount=0.00, child_rate=0.7):
+def calculate_booking_totals(price_per_person, num_adults, num_children=0, discount=0, child_rate=None):
     """
-    Calculate booking totals
+    Calculate booking totals (exact paise arithmetic, see app/services/pricing.py)
 
     Args:
         price_per_person: Price per adult
         num_adults: Number of adults
         num_children: Number of children
         discount: Discount amount
-        child_rate: Child rate multiplier (default 70% of adult price)
+        child_rate: Child rate multiplier (default CHILD_PRICE_RATE, 70% of adult price)
 
     Returns:
-        dict with total_amount, tax_amount, final_amount
+        dict with total_amount, subtotal (after discount), tax_amount, final_amount as Decimals
     """
-    adult_total = float(price_per_person) * num_adults
-    children_total = float(price_per_person) * child_rate * num_children
-
-    total_amount = adult_total + children_total
-    discounted_amount = total_amount - float(discount)
-    tax_amount = calculate_tax(discounted_amount)
-    final_amount = discounted_amount + tax_amount
+    prices = PricingEngine.price(price_per_person, num_adults, num_children, discount, child_rate=child_rate)
 
     return {
-        "total_amount": round(total_amount, 2),
-        "tax_amount": round(tax_amount, 2),
-        "final_amount": round(final_amount, 2)
+        "total_amount": prices.total_amount,
+        "subtotal": prices.subtotal,
+        "tax_amount": prices.tax_amount,
+        "final_amount": prices.final_amount
     }
@@ -23,6 +23,16 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool, per worker process (see app/services/db_pool.py).
+    # Recycle connections before the server drops idle ones; 0 disables the
+    # statement timeout.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10))  # seconds to wait for a connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 280))  # seconds
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
     # CORS Configuration
     CORS_ORIGINS = [
         "https://admin.waynextravels.com",
@@ -36,14 +46,103 @@ class Config:
     # Resend Email OTP Configuration
     RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
 
+    # Hashing policy (see app/services/password_hashing.py). Stored password
+    # hashes with a different method/cost are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    OTP_HMAC_KEY = os.getenv("OTP_HMAC_KEY", SECRET_KEY)
+    # Where slow password hashes run: "inline", "thread" or "process" pool
+    HASHING_EXECUTOR = os.getenv("HASHING_EXECUTOR", "thread")
+    HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", 2))
+
     # JWT Configuration for Remember Me
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", SECRET_KEY)
     JWT_EXPIRY_DAYS = 30
 
+    # Verified remember tokens cached per process (see app/services/token_cache.py).
+    # Revocations are published as per-user markers in REMEMBER_TOKEN_REVOCATION_DIR,
+    # which every app process (on every host) must share.
+    REMEMBER_TOKEN_CACHE_SIZE = int(os.getenv("REMEMBER_TOKEN_CACHE_SIZE", 10000))
+    REMEMBER_TOKEN_CACHE_TTL = int(os.getenv("REMEMBER_TOKEN_CACHE_TTL", JWT_EXPIRY_DAYS * 86400))
+
     # Upload folder for invoices/documents
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
+    # Seconds to cache admin dashboard stats (0 disables the cache)
+    DASHBOARD_STATS_TTL = int(os.getenv("DASHBOARD_STATS_TTL", 30))
+
+    # Background report exports (files and job state, shared by all workers)
+    REPORT_EXPORT_FOLDER = os.getenv("REPORT_EXPORT_FOLDER", os.path.join(UPLOAD_FOLDER, 'reports'))
+    EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", 2))
+    EXPORT_JOB_TIMEOUT = int(os.getenv("EXPORT_JOB_TIMEOUT", 3600))  # unfinished jobs fail after this
+    EXPORT_JOB_TTL = int(os.getenv("EXPORT_JOB_TTL", 86400))  # finished jobs are deleted after this
+
+    # Remember-token revocation markers (shared by all workers, see REMEMBER_TOKEN_CACHE_*)
+    REMEMBER_TOKEN_REVOCATION_DIR = os.getenv(
+        "REMEMBER_TOKEN_REVOCATION_DIR", os.path.join(UPLOAD_FOLDER, 'token_revocations')
+    )
+
+    # Search backend: "trigram" (PostgreSQL pg_trgm, ranked and typo-tolerant)
+    # or "ilike" (plain substring match, no extension required)
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "trigram")
+
+    # Outgoing email (see app/services/email_outbox.py)
+    # EMAIL_TRANSPORT: "resend" or "local" (in memory, for tests/development)
+    EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "resend")
+    # Run outbox worker threads inside the web process instead of email_worker.py
+    EMAIL_OUTBOX_INLINE_WORKER = os.getenv("EMAIL_OUTBOX_INLINE_WORKER", "false").lower() == "true"
+    EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", 2))
+    EMAIL_OUTBOX_BATCH_SIZE = 50
+    EMAIL_OUTBOX_POLL_INTERVAL = 2  # seconds
+    EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+    EMAIL_OUTBOX_RETRY_BASE = 5  # seconds, doubled after each failed attempt
+    EMAIL_OUTBOX_RETRY_MAX = 60
+
+    # Pricing (see app/services/pricing.py); strings keep the rates exact
+    GST_RATE = os.getenv("GST_RATE", "0.18")
+    CHILD_PRICE_RATE = os.getenv("CHILD_PRICE_RATE", "0.7")
+
+    # Largest batch accepted by POST /api/bookings/bulk
+    BULK_BOOKING_MAX_ITEMS = int(os.getenv("BULK_BOOKING_MAX_ITEMS", 1000))
+
+    # Cache-Control for GET responses per blueprint (see app/services/http_cache.py).
+    # Catalog data is public; per-user data may be stored by the client but
+    # must be revalidated (ETag -> 304) before reuse.
+    HTTP_CACHE_CONTROL = {
+        "tours": "public, max-age=300",
+        "users": "private, no-cache",
+        "bookings": "private, no-cache",
+        "admin": "no-store",
+    }
+
+    # JSON encoder for responses: "orjson" (fast, C) or "default" (stdlib)
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+
+    # Response compression (brotli if installed, else gzip) above this size
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_SIZE = 1024  # bytes
+    COMPRESS_CACHE_ENTRIES = 256  # precompressed /api/tours/structured variants
+
+    # Request timing (see app/services/perf.py): per-process ring buffer
+    # behind GET /api/admin/perf, and optional Server-Timing headers
+    PERF_ENABLED = os.getenv("PERF_ENABLED", "true").lower() == "true"
+    PERF_BUFFER_SIZE = int(os.getenv("PERF_BUFFER_SIZE", 5000))
+    PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", "true").lower() == "true"
+
+    # Prometheus /metrics (needs prometheus_client; see app/services/metrics.py)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Per-request SQL query counting (always on in debug/testing); strict
+    # mode raises when a view exceeds its @query_budget instead of warning
+    QUERY_COUNTER_ENABLED = os.getenv("QUERY_COUNTER_ENABLED", "false").lower() == "true"
+    QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+
+    # Tour catalog (served from memory, see app/services/tour_catalog.py)
+    TOUR_CATALOG_PATH = os.getenv(
+        "TOUR_CATALOG_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'waynex_tours_complete.json')
+    )
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -52,6 +151,11 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     # Override with production settings
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 4))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+    # Don't reveal internal timings to public clients unless asked to
+    PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", "false").lower() == "true"
 
 
 config = {
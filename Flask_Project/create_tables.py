@@ -1,5 +1,9 @@
+from datetime import datetime
+from sqlalchemy import func, update
 from app import create_app
 from app.extensions import db
+from app.models import User
+from app.services.search import ensure_search_indexes
 
 app = create_app()
 
@@ -7,3 +11,31 @@ with app.app_context():
     print("Creating database tables...")
     db.create_all()
     print("✓ Database tables created successfully!")
+
+    # create_all() skips tables that already exist, so add any indexes
+    # declared on the models since those tables were created
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+    # users.created_at is part of the admin users keyset and became NOT NULL
+    # (a row comparison never matches NULL, so such users dropped out of
+    # every page after the first). Backfill rows inserted without one from
+    # updated_at (or the epoch, sorting them last), then tighten the column
+    # where the database supports ALTER COLUMN.
+    result = db.session.execute(
+        update(User)
+        .where(User.created_at.is_(None))
+        .values(created_at=func.coalesce(User.updated_at, datetime(1970, 1, 1)),
+                updated_at=User.updated_at)
+    )
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(db.text("ALTER TABLE users ALTER COLUMN created_at SET NOT NULL"))
+    db.session.commit()
+    if result.rowcount:
+        print(f"✓ Backfilled created_at for {result.rowcount} users")
+
+    if app.config.get("SEARCH_BACKEND") == "trigram":
+        print("Creating search indexes...")
+        ensure_search_indexes(db)
+        print("✓ Search indexes created successfully!")
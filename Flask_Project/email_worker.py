@@ -0,0 +1,30 @@
+"""
+Deliver queued emails (OTP codes) from the email_outbox table.
+Run alongside the web app, e.g. as an always-on task:
+
+    python email_worker.py
+"""
+
+import os
+import time
+
+# This process is the worker: keep create_app() from also starting the
+# inline one (and sizing the pool for it) when the web app's environment
+# sets EMAIL_OUTBOX_INLINE_WORKER=true. Must be set before config is imported.
+os.environ["EMAIL_OUTBOX_INLINE_WORKER"] = "false"
+
+from app import create_app
+from app.services.email_outbox import OutboxWorker
+
+app = create_app(os.getenv("FLASK_ENV", "development"))
+
+print("Starting email outbox worker...")
+worker = OutboxWorker(app).start()
+print("✓ Email worker running (Ctrl+C to stop)")
+
+try:
+    while True:
+        time.sleep(60)
+except KeyboardInterrupt:
+    print("Stopping email worker...")
+    worker.stop()
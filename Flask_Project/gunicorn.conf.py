@@ -0,0 +1,97 @@
+"""
+Gunicorn settings for production:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers default to 2 x cores + 1, each with GUNICORN_THREADS request
+threads (gthread), since most request time is spent waiting on the
+database. Every worker is restarted gracefully after about
+GUNICORN_MAX_REQUESTS requests (with jitter, so they don't all restart at
+once), finishing in-flight requests within graceful_timeout.
+
+Startup fails if a worker's connection pool (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+can't serve all of its threads, or if all workers together could open more
+than DB_MAX_CONNECTIONS connections (when set).
+"""
+
+import os
+import shutil
+import tempfile
+
+# Workers share metrics through this directory (see app/services/metrics.py).
+# It must exist before the app (and prometheus_client) is imported, and
+# start empty. By default every gunicorn instance gets its own new directory
+# (removed on exit), so instances on the same host never share files; a
+# directory set in the environment is left to its owner.
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:  # not on config reloads (HUP)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="waynex-prometheus-")
+    os.environ["WAYNEX_PROMETHEUS_TMPDIR"] = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from config import config as app_configs
+from app.services.db_pool import connections_per_worker, validate_pool_config
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))  # cores this process may use
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+env = os.getenv("FLASK_ENV", "production")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", _cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Graceful worker recycling
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+# Each worker builds its own app, engine and background threads after the
+# fork, so no connection or thread is shared between processes
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    settings = {name: getattr(app_configs[env], name) for name in dir(app_configs[env]) if name.isupper()}
+    validate_pool_config(settings)
+
+    pool = settings["DB_POOL_SIZE"] + settings["DB_MAX_OVERFLOW"]
+    needed = connections_per_worker(settings, threads)
+    if pool < needed:
+        raise RuntimeError(
+            f"DB_POOL_SIZE + DB_MAX_OVERFLOW ({pool}) is less than the {needed} "
+            f"connections a worker may need ({threads} threads plus background workers)"
+        )
+
+    max_connections = int(os.getenv("DB_MAX_CONNECTIONS", 0))
+    if max_connections and workers * pool > max_connections:
+        raise RuntimeError(
+            f"{workers} workers x {pool} connections exceeds DB_MAX_CONNECTIONS ({max_connections})"
+        )
+
+    print(f"[Gunicorn] {workers} workers x {threads} threads, "
+          f"pool {settings['DB_POOL_SIZE']}+{settings['DB_MAX_OVERFLOW']} per worker ({env})")
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    # Only remove the directory this instance created
+    if os.environ.get("WAYNEX_PROMETHEUS_TMPDIR") == os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        shutil.rmtree(os.environ["WAYNEX_PROMETHEUS_TMPDIR"], ignore_errors=True)
@@ -1,161 +1,64 @@
 """
-Import tours and visas data from JSON files into the database
-Run this after create_tables.py
-"""
-
-from app import create_app
-from app.extensions import db
-from app.models import Tour, Visa
-import json
-import re
-
-app = create_app()
-
-def parse_price(price_str):
-    """Extract numeric value from price string like '₹6,250'"""
-    if not price_str:
-        return None
-    # Remove currency symbols and commas
-    numeric = re.sub(r'[^\d.]', '', price_str)
-    try:
-        return float(numeric)
-    except:
-        return None
-
-def import_tours():
-    """Import tours from JSON file"""
-    print("Importing tours...")
-
-    with open('data/waynex_tours_complete.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    tours_data = data.get('data', {})
-    count = 0
-
-    # Import domestic tours
-    for state, tours in tours_data.get('domestic', {}).items():
-        for tour in tours:
-            # Check if tour already exists
-            existing = Tour.query.filter_by(code=tour['code']).first()
-            if existing:
-                print(f"Tour {tour['code']} already exists, skipping...")
-                continue
+Import a tour scrape into the tour catalog (TOUR_CATALOG_PATH)
 
-            new_tour = Tour(
-                code=tour['code'],
-                name=tour['name'],
-                tour_type='domestic',
-                category=state,
-                duration=tour.get('duration'),
-                price=tour.get('price', 0),
-                destinations=tour.get('destinations'),
-                card_image=tour.get('card_image'),
-                slider_images=tour.get('slider_images', []),
-                highlights=tour.get('highlights', []),
-                itinerary=tour.get('itinerary', []),
-                hotels=tour.get('hotels', []),
-                inclusions=tour.get('inclusions', []),
-                exclusions=tour.get('exclusions', []),
-                why_tour_with_waynex=tour.get('why_tour_with_waynex', []),
-                is_active=True
-            )
-            db.session.add(new_tour)
-            count += 1
+    python import_data.py scrape.json             # upsert changed tours
+    python import_data.py scrape.json --dry-run   # only show what would change
 
-    # Import international tours
-    for region, tours in tours_data.get('international', {}).items():
-        for tour in tours:
-            # Check if tour already exists
-            existing = Tour.query.filter_by(code=tour['code']).first()
-            if existing:
-                print(f"Tour {tour['code']} already exists, skipping...")
-                continue
-
-            new_tour = Tour(
-                code=tour['code'],
-                name=tour['name'],
-                tour_type='international',
-                category=region,
-                duration=tour.get('duration'),
-                price=tour.get('price', 0),
-                destinations=tour.get('destinations'),
-                card_image=tour.get('card_image'),
-                slider_images=tour.get('slider_images', []),
-                highlights=tour.get('highlights', []),
-                itinerary=tour.get('itinerary', []),
-                hotels=tour.get('hotels', []),
-                inclusions=tour.get('inclusions', []),
-                exclusions=tour.get('exclusions', []),
-                why_tour_with_waynex=tour.get('why_tour_with_waynex', []),
-                is_active=True
-            )
-            db.session.add(new_tour)
-            count += 1
-
-    db.session.commit()
-    print(f"✓ Imported {count} tours successfully!")
-
-
-def import_visas():
-    """Import visas from JSON file"""
-    print("Importing visas...")
+Tours are matched by code and compared by content hash, so only new and
+changed tours are rewritten (see app/services/catalog_import.py). Running
+workers keep serving the old catalog until they reload it: POST
+/api/admin/tours/reload, or `kill -HUP` the gunicorn master to restart
+every worker.
+"""
 
-    with open('data/data.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+import argparse
+import sys
+from config import Config
+from app.services.catalog_import import CatalogImportService
 
-    count = 0
 
-    for visa in data:
-        # Check if visa already exists
-        existing = Visa.query.filter_by(country=visa['Country']).first()
-        if existing:
-            print(f"Visa for {visa['Country']} already exists, skipping...")
-            continue
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import a tour scrape into the tour catalog")
+    parser.add_argument("source", help="Scraped tours JSON ({\"metadata\", \"data\": {type: {category: [tour]}}})")
+    parser.add_argument("--catalog", default=Config.TOUR_CATALOG_PATH,
+                        help="Catalog file to update (default: TOUR_CATALOG_PATH)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List inserted/updated tours without writing the catalog")
+    return parser.parse_args()
 
-        new_visa = Visa(
-            country=visa['Country'],
-            country_code=visa.get('Country')[:2].upper() if visa.get('Country') else None,
-            price=visa.get('Price'),
-            price_numeric=parse_price(visa.get('Price')),
-            processing_time=visa.get('Get on'),
-            category=visa.get('category'),
-            image_url=visa.get('ImageURL'),
-            video_url=visa.get('Video URL'),
-            required_docs=visa.get('Required Docs', []),
-            visa_info=visa.get('Visa Info', {}),
-            is_active=True
-        )
-        db.session.add(new_visa)
-        count += 1
 
-    db.session.commit()
-    print(f"✓ Imported {count} visas successfully!")
+def print_diff(result):
+    for code in result["inserted"]:
+        print(f"  + {code}")
+    for code in result["updated"]:
+        print(f"  ~ {code}: {', '.join(result['changed_fields'][code])}")
 
 
 if __name__ == "__main__":
-    with app.app_context():
-        print("=" * 60)
-        print("Waynex Travels - Data Import")
-        print("=" * 60)
+    args = parse_args()
 
-        try:
-            import_tours()
-            import_visas()
+    print("=" * 60)
+    print("Waynex Travels - Tour Catalog Import" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
 
-            print("\n" + "=" * 60)
-            print("✓ All data imported successfully!")
-            print("=" * 60)
-
-            # Print summary
-            total_tours = Tour.query.count()
-            total_visas = Visa.query.count()
-
-            print(f"\nDatabase Summary:")
-            print(f"  Tours: {total_tours}")
-            print(f"  Visas: {total_visas}")
-
-        except Exception as e:
-            print(f"\n✗ Error importing data: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            db.session.rollback()
+    try:
+        result = CatalogImportService.import_file(args.source, args.catalog, dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"\n✗ Error importing tours: {str(e)}")
+        sys.exit(1)
+
+    if args.dry_run:
+        print_diff(result)
+
+    print(f"\nInserted:  {len(result['inserted'])}")
+    print(f"Updated:   {len(result['updated'])}")
+    print(f"Unchanged: {len(result['unchanged'])}")
+    print(f"Not in source (kept): {len(result['missing'])}")
+    if result["skipped"]:
+        print(f"Skipped records without a code or with a duplicate code: {result['skipped']}")
+
+    if result["written"]:
+        print(f"\n✓ Catalog written to {args.catalog}")
+        print("  Reload workers: POST /api/admin/tours/reload or `kill -HUP <gunicorn master pid>`")
+    elif not args.dry_run:
+        print("\n✓ Catalog already up to date, nothing written")
@@ -0,0 +1,14 @@
+"""
+Rebuild the booking analytics rollups from the bookings table.
+Run once after upgrading (backfill) or after bulk SQL changes to bookings.
+"""
+
+from app import create_app
+from app.services.analytics import AnalyticsService
+
+app = create_app()
+
+with app.app_context():
+    print("Rebuilding analytics rollups...")
+    rows = AnalyticsService.rebuild()
+    print(f"✓ Rebuilt {rows} rollup rows successfully!")
@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers (run.py is the development server):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+from app import create_app
+
+app = create_app(os.getenv("FLASK_ENV", "production"))